@@ -0,0 +1,42 @@
+# analytics/benchmarks/bench_data_cleaner.py
+
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from synthetic_data import SupplyChainDataGenerator  # noqa: E402
+from data_processing.data_cleaner import DataCleaner  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def measure(cleaner: DataCleaner, df: pd.DataFrame):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = cleaner.clean_data(df)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 1024 ** 2
+
+def run(sizes):
+    for rows in sizes:
+        data = SupplyChainDataGenerator({}).raw_products(rows)
+        input_mb = data.memory_usage(deep=True).sum() / 1024 ** 2
+        for mode, config in [('current', {}), ('memory_efficient', {'memory_efficient': True})]:
+            result, seconds, peak_mb = measure(DataCleaner(config), data.copy())
+            output_mb = result.memory_usage(deep=True).sum() / 1024 ** 2
+            logger.info(f"{rows:>9,} rows {mode:>16}: {seconds:.2f}s, traced peak {peak_mb:.0f} MB "
+                        f"({peak_mb / input_mb:.1f}x input), output {output_mb:.0f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark DataCleaner.clean_data memory and time")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 20_000])
+    args = parser.parse_args()
+    run(args.sizes)
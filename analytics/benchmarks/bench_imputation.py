@@ -0,0 +1,57 @@
+# analytics/benchmarks/bench_imputation.py
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from synthetic_data import SupplyChainDataGenerator  # noqa: E402
+from data_processing.imputation import make_imputer  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['price', 'quantity', 'age_days']
+
+def make_batch(rows: int, missing_rate: float = 0.05) -> pd.DataFrame:
+    generator = SupplyChainDataGenerator({'missing_rate': missing_rate})
+    df = generator.products(rows)[['product_id', 'category', 'last_updated'] + COLUMNS]
+    return generator.inject_missing(df.astype({col: float for col in COLUMNS}), COLUMNS)
+
+def run(sizes, strategies, knn_limit):
+    for rows in sizes:
+        data = make_batch(rows)
+        for strategy in strategies:
+            if strategy == 'knn':
+                if rows > knn_limit:
+                    logger.info(f"{rows:>10,} rows {strategy:>15}: skipped (above --knn-limit)")
+                    continue
+                from sklearn.impute import KNNImputer
+                start = time.perf_counter()
+                KNNImputer(n_neighbors=5).fit_transform(data[COLUMNS])
+                fit_seconds, transform_seconds = time.perf_counter() - start, 0.0
+            else:
+                imputer = make_imputer(strategy)
+                start = time.perf_counter()
+                imputer.fit(data, COLUMNS)
+                fit_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                imputer.transform(data.copy())
+                transform_seconds = time.perf_counter() - start
+            total = fit_seconds + transform_seconds
+            logger.info(f"{rows:>10,} rows {strategy:>15}: fit {fit_seconds:.2f}s, "
+                        f"transform {transform_seconds:.2f}s ({rows / total:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Imputation scaling curve per strategy")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 5_000_000])
+    parser.add_argument('--strategies', nargs='+',
+                        default=['knn', 'grouped_median', 'forward_fill', 'sampled_knn'])
+    parser.add_argument('--knn-limit', type=int, default=50_000,
+                        help="Largest size to run the whole-frame KNNImputer baseline on")
+    args = parser.parse_args()
+    run(args.sizes, args.strategies, args.knn_limit)
@@ -0,0 +1,60 @@
+# analytics/benchmarks/bench_inference_server.py
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from models.inference_server import MicroBatcher  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def make_model(rows: int = 20000, features: int = 4, seed: int = 42) -> RandomForestRegressor:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, features))
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) + rng.normal(scale=0.3, size=rows)
+    return RandomForestRegressor(n_estimators=100, max_depth=10, n_jobs=-1, random_state=seed).fit(X, y)
+
+def drive(batcher: MicroBatcher, clients: int, requests_per_client: int, features: int):
+    # Each client sends single-row requests back to back, like concurrent API callers
+    def client(seed):
+        rng = np.random.default_rng(seed)
+        for _ in range(requests_per_client):
+            batcher.predict(rng.normal(size=(1, features)))
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+def run(clients_list, requests_per_client, max_wait_ms, max_batch_size):
+    model = make_model()
+    for clients in clients_list:
+        for label, batch_size in (('unbatched', 1), ('micro-batched', max_batch_size)):
+            batcher = MicroBatcher(label, model.predict, max_batch_size=batch_size,
+                                   max_wait_ms=max_wait_ms, n_features=model.n_features_in_)
+            seconds = drive(batcher, clients, requests_per_client, model.n_features_in_)
+            stats = batcher.get_stats()
+            batcher.stop()
+            logger.info(f"{clients:>4} clients {label:>14}: {stats['requests'] / seconds:8.0f} req/s, "
+                        f"p50 {stats['p50_ms']:6.1f} ms, p99 {stats['p99_ms']:6.1f} ms, "
+                        f"avg batch {stats['avg_batch_rows']:.1f} rows")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched model inference")
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=200, help="requests per client")
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    args = parser.parse_args()
+    run(args.clients, args.requests, args.max_wait_ms, args.max_batch_size)
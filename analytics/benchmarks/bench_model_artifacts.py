@@ -0,0 +1,97 @@
+# analytics/benchmarks/bench_model_artifacts.py
+
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from models.features import FeaturePipeline  # noqa: E402
+from models.predictive_model import SupplyChainPredictiveModel  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Numeric features only, so the saved artifact and the workers agree on the
+# feature pipeline without a category vocabulary
+MODEL_CONFIG = {'categorical_columns': []}
+
+def make_data(rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(rows, len(SupplyChainPredictiveModel.FEATURES))),
+                      columns=SupplyChainPredictiveModel.FEATURES)
+    df[SupplyChainPredictiveModel.TARGET] = (df.iloc[:, 0] * 3 + np.sin(df.iloc[:, 1])
+                                             + rng.normal(scale=0.3, size=rows))
+    return df
+
+def memory_mb():
+    # RSS counts shared file pages in full for every process; PSS splits them
+    # between the processes mapping them, so it shows what a worker really adds
+    usage = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            key, value = line.split(':', 1)
+            if key in ('Rss', 'Pss'):
+                usage[key.lower()] = int(value.split()[0]) / 1024
+    return usage
+
+def worker(model_format, filepath, barrier, results):
+    # One gunicorn-style worker: load once, serve a batch, then report memory
+    # while every other worker still holds its model
+    start = time.perf_counter()
+    model = SupplyChainPredictiveModel({**MODEL_CONFIG, 'model_format': model_format})
+    model.load_model(filepath)
+    load_seconds = time.perf_counter() - start
+
+    X = FeaturePipeline(SupplyChainPredictiveModel.FEATURES, []).fit_transform(make_data(1000, seed=os.getpid()))
+    start = time.perf_counter()
+    model.predict(X)
+    predict_seconds = time.perf_counter() - start
+
+    barrier.wait()
+    results.put({'load': load_seconds, 'predict': predict_seconds, **memory_mb()})
+    barrier.wait()
+
+def run(rows, trees, workers):
+    model = SupplyChainPredictiveModel({**MODEL_CONFIG, 'search_mode': 'halving', 'search_max_fits': 3,
+                                        'forest_step': trees, 'forest_max_estimators': trees})
+    X, y = model.prepare_data(make_data(rows))
+    model.train_model(X, y)
+
+    context = mp.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        for model_format in ('joblib', 'artifact'):
+            filepath = os.path.join(directory, f"model_{model_format}.joblib")
+            model.config['model_format'] = model_format
+            model.save_model(filepath)
+            size_mb = os.path.getsize(filepath) / 1024 ** 2
+
+            barrier = context.Barrier(workers)
+            results = context.Queue()
+            processes = [context.Process(target=worker, args=(model_format, filepath, barrier, results))
+                         for _ in range(workers)]
+            for process in processes:
+                process.start()
+            stats = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+            logger.info(f"{model_format:>8} ({size_mb:.0f} MB file, {workers} workers): "
+                        f"load {np.median([s['load'] for s in stats]):.2f}s, "
+                        f"first predict of 1000 rows {np.median([s['predict'] for s in stats]) * 1000:.0f} ms, "
+                        f"RSS {np.median([s['rss'] for s in stats]):.0f} MB, "
+                        f"PSS {np.median([s['pss'] for s in stats]):.0f} MB per worker")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark model load time and per-worker memory")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    run(args.rows, args.trees, args.workers)
@@ -0,0 +1,233 @@
+# analytics/benchmarks/run_benchmarks.py
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from synthetic_data import SupplyChainDataGenerator  # noqa: E402
+from data_processing.data_cleaner import DataCleaner  # noqa: E402
+from data_processing.etl import SupplyChainETL  # noqa: E402
+from models.predictive_model import SupplyChainPredictiveModel  # noqa: E402
+from models.anomaly_detection import SupplyChainAnomalyDetection  # noqa: E402
+from visualization.dashboard import DashboardAggregates, ProductIndex, ProductOptions  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'history.jsonl')
+
+ETL_CONFIG = {
+    'sql_connection_string': 'sqlite://',
+    'mongo_connection_string': 'mongodb://localhost:27017/',
+    'mongo_db_name': 'supplychain'
+}
+
+# Small search and forest budgets: the suite tracks the cost of the code paths,
+# not model quality
+PREDICTIVE_CONFIG = {'search_mode': 'halving', 'search_max_fits': 9, 'search_candidates': 9,
+                     'forest_step': 25, 'forest_max_estimators': 50}
+
+# Each case takes the generator and the base row count and returns
+# (callable to time, rows it processes). Inputs the callable mutates are
+# copied inside it, so every repeat starts from the same data.
+def case_clean_data(generator: SupplyChainDataGenerator, rows: int):
+    raw = generator.raw_products(rows)
+    cleaner = DataCleaner({'memory_efficient': True})
+    return lambda: cleaner.clean_data(raw.copy()), rows
+
+def case_transform_products(generator: SupplyChainDataGenerator, rows: int):
+    etl = SupplyChainETL(ETL_CONFIG)
+    frame = generator.etl_product_frame(rows * generator.transfers_per_product)
+    return lambda: etl.transform_product_data(frame.copy()), len(frame)
+
+def case_transform_certifications(generator: SupplyChainDataGenerator, rows: int):
+    etl = SupplyChainETL(ETL_CONFIG)
+    records = generator.certifications(generator.products(rows)).to_dict('records')
+    return lambda: etl.transform_certification_data(records), len(records)
+
+def case_transform_events(generator: SupplyChainDataGenerator, rows: int):
+    etl = SupplyChainETL(ETL_CONFIG)
+    events = generator.iot_events(rows)
+    events['timestamp'] = events['timestamp'].astype(str)
+    records = events.to_dict('records')
+    return lambda: etl.transform_event_data(records), len(records)
+
+def _predictive_data(generator: SupplyChainDataGenerator, rows: int):
+    model = SupplyChainPredictiveModel(PREDICTIVE_CONFIG)
+    X, y = model.prepare_data(generator.model_frame(rows))
+    return model, X, y
+
+def case_predictive_train(generator: SupplyChainDataGenerator, rows: int):
+    model, X, y = _predictive_data(generator, rows)
+    return lambda: model.train_model(X, y), rows
+
+def case_predictive_predict(generator: SupplyChainDataGenerator, rows: int):
+    model, X, y = _predictive_data(generator, rows)
+    model.train_model(X, y)
+    return lambda: model.predict(X), rows
+
+def _anomaly_data(generator: SupplyChainDataGenerator, rows: int):
+    detector = SupplyChainAnomalyDetection({})
+    X = detector.encode_data(generator.model_frame(rows))
+    return detector, X
+
+def case_anomaly_train(generator: SupplyChainDataGenerator, rows: int):
+    detector, X = _anomaly_data(generator, rows)
+    X_scaled = detector.scale_data(X, copy=True)
+    return lambda: detector.train_model(X_scaled, 0.01), rows
+
+def case_anomaly_detect(generator: SupplyChainDataGenerator, rows: int):
+    detector, X = _anomaly_data(generator, rows)
+    detector.train_model(detector.scale_data(X, copy=True), 0.01)
+    return lambda: detector.detect_anomalies(X), rows
+
+def case_anomaly_explain(generator: SupplyChainDataGenerator, rows: int):
+    detector, X = _anomaly_data(generator, rows)
+    detector.train_model(detector.scale_data(X, copy=True), 0.01)
+    return lambda: detector.explain_anomalies(X), rows
+
+def _dashboard_frame(generator: SupplyChainDataGenerator, rows: int) -> pd.DataFrame:
+    # About 20 joined rows per product, so rows // 20 products
+    return generator.dashboard_frame(max(1, rows // 20))
+
+def case_dashboard_aggregates(generator: SupplyChainDataGenerator, rows: int):
+    # update_graphs on a cache refresh: aggregates plus the four figures
+    frame = _dashboard_frame(generator, rows)
+
+    def run():
+        aggregates = DashboardAggregates(frame)
+        return (aggregates.category_figure(), aggregates.transfers_figure(),
+                aggregates.ethical_figure(), aggregates.certification_figure())
+    return run, len(frame)
+
+def case_dashboard_product_index(generator: SupplyChainDataGenerator, rows: int):
+    frame = _dashboard_frame(generator, rows)
+    return lambda: ProductIndex(frame), len(frame)
+
+def case_dashboard_product_search(generator: SupplyChainDataGenerator, rows: int):
+    products = _dashboard_frame(generator, rows)[['product_id', 'name']].drop_duplicates('product_id')
+    options = ProductOptions(products, ProductOptions.signature_of(products))
+    return lambda: [options.search(term, 50) for term in ('product-1', 'product-42', 'xyz')], len(products)
+
+CASES = {
+    'data_cleaner.clean_data': case_clean_data,
+    'etl.transform_product_data': case_transform_products,
+    'etl.transform_certification_data': case_transform_certifications,
+    'etl.transform_event_data': case_transform_events,
+    'predictive_model.train': case_predictive_train,
+    'predictive_model.predict': case_predictive_predict,
+    'anomaly_detection.train': case_anomaly_train,
+    'anomaly_detection.detect': case_anomaly_detect,
+    'anomaly_detection.explain': case_anomaly_explain,
+    'dashboard.aggregates': case_dashboard_aggregates,
+    'dashboard.product_index': case_dashboard_product_index,
+    'dashboard.product_search': case_dashboard_product_search
+}
+
+def time_case(fn: Callable[[], Any], repeats: int) -> List[float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment() -> Dict[str, Any]:
+    return {
+        'host': platform.node(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__
+    }
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def baseline_for(history: List[Dict[str, Any]], run: Dict[str, Any], case: str, window: int) -> Optional[float]:
+    # Median of the case's best times over its last `window` runs at the same
+    # scale on the same host; best times are far less noisy than medians
+    previous = [entry['cases'][case]['min_seconds'] for entry in history
+                if case in entry['cases'] and entry['rows'] == run['rows'] and entry['seed'] == run['seed']
+                and entry['environment']['host'] == run['environment']['host']][-window:]
+    return float(np.median(previous)) if previous else None
+
+def run(rows: int, repeats: int, selected: Optional[List[str]], results_path: str, threshold: float,
+        window: int, seed: int, save: bool) -> int:
+    generator = SupplyChainDataGenerator({'n_products': rows, 'seed': seed})
+    history = load_history(results_path)
+    result = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), 'commit': git_commit(),
+              'rows': rows, 'seed': seed, 'repeats': repeats, 'environment': environment(), 'cases': {}}
+
+    regressions = []
+    for name, case in CASES.items():
+        if selected and not any(term in name for term in selected):
+            continue
+        fn, case_rows = case(generator, rows)
+        # One untimed call warms caches and lazy imports
+        fn()
+        timings = time_case(fn, repeats)
+        median, best = float(np.median(timings)), float(min(timings))
+        result['cases'][name] = {'rows': case_rows, 'median_seconds': median, 'min_seconds': best,
+                                 'rows_per_second': case_rows / median if median else None}
+
+        baseline = baseline_for(history, result, name, window)
+        change = ''
+        if baseline:
+            ratio = best / baseline
+            change = f", min {ratio - 1:+.0%} vs baseline {baseline:.3f}s"
+            if ratio > 1 + threshold:
+                regressions.append(name)
+                change += " REGRESSION"
+        logger.info(f"{name:<34} {case_rows:>10,} rows: median {median:.3f}s, min {best:.3f}s{change}")
+
+    if save:
+        os.makedirs(os.path.dirname(results_path), exist_ok=True)
+        with open(results_path, 'a') as f:
+            f.write(json.dumps(result) + '\n')
+        logger.info(f"Results appended to {results_path}")
+    if regressions:
+        logger.warning(f"{len(regressions)} cases slower than baseline by more than {threshold:.0%}: "
+                       f"{', '.join(regressions)}")
+    return len(regressions)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the analytics benchmark suite on synthetic data")
+    parser.add_argument('--rows', type=int, default=20000, help="products per case; transfers scale with it")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--cases', nargs='+', help="only cases whose name contains one of these terms")
+    parser.add_argument('--results', default=RESULTS_PATH)
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="flag cases slower than their baseline by more than this fraction")
+    parser.add_argument('--baseline-window', type=int, default=5,
+                        help="baseline is the median of this many previous runs")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-save', action='store_true', help="compare against history without recording")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    regressions = run(args.rows, args.repeats, args.cases, args.results, args.threshold, args.baseline_window,
+                      args.seed, not args.no_save)
+    sys.exit(1 if regressions and args.fail_on_regression else 0)
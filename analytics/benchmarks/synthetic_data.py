@@ -0,0 +1,275 @@
+# analytics/benchmarks/synthetic_data.py
+
+import argparse
+import logging
+import os
+import sys
+import zlib
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class SupplyChainDataGenerator:
+    # Synthetic versions of the tables the ETL, DataCleaner, both models and
+    # the dashboard read: products, transfers, certifications, ethical scores
+    # and IoT readings. Category sizes and transfers per product follow Zipf
+    # weights (category_skew, transfer_skew; 0 means uniform). Every table
+    # draws from its own seeded stream, so it does not depend on call order.
+    CATEGORIES = ['Electronics', 'Food', 'Textiles', 'Pharma', 'Toys', 'Home & Garden', 'Automotive', 'Cosmetics']
+    # Spelling variants DataCleaner.handle_inconsistent_categories maps back
+    CATEGORY_VARIANTS = {'Electronics': 'electronic'}
+    SCORE_CATEGORIES = ['environmental', 'labor', 'sourcing', 'governance']
+    CERTIFICATION_BODIES = ['Fair Trade', 'ISO 9001', 'Rainforest Alliance', 'FSC', 'GOTS']
+    LOCATIONS = [('Rotterdam', 51.92, 4.48), ('Shanghai', 31.23, 121.47), ('Singapore', 1.35, 103.82),
+                 ('Los Angeles', 34.05, -118.24), ('Hamburg', 53.55, 9.99), ('Dubai', 25.20, 55.27),
+                 ('Mumbai', 19.08, 72.88), ('Santos', -23.96, -46.33)]
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.seed = config.get('seed', 42)
+        self.n_products = config.get('n_products', 10000)
+        self.transfers_per_product = config.get('transfers_per_product', 8)
+        self.category_skew = config.get('category_skew', 1.0)
+        self.transfer_skew = config.get('transfer_skew', 0.5)
+        self.missing_rate = config.get('missing_rate', 0.02)
+        self.duplicate_rate = config.get('duplicate_rate', 0.05)
+        self.start = np.datetime64(config.get('start_date', '2024-01-01'), 's')
+        self.days = config.get('days', 90)
+
+    def _rng(self, table: str) -> np.random.Generator:
+        return np.random.default_rng([self.seed, zlib.crc32(table.encode())])
+
+    @staticmethod
+    def _zipf(n: int, skew: float) -> np.ndarray:
+        weights = 1.0 / np.arange(1, n + 1) ** skew
+        return weights / weights.sum()
+
+    @staticmethod
+    def _labels(prefix: str, codes: np.ndarray, n_labels: int) -> pd.Categorical:
+        # Repeated string columns as categoricals, so tens of millions of rows
+        # cost one small code array each
+        return pd.Categorical.from_codes(codes, [f"{prefix}{i}" for i in range(n_labels)])
+
+    def inject_missing(self, df: pd.DataFrame, columns: List[str], rate: Optional[float] = None,
+                       table: str = 'missing') -> pd.DataFrame:
+        rng = self._rng(table)
+        rate = self.missing_rate if rate is None else rate
+        for col in columns:
+            df.loc[rng.random(len(df)) < rate, col] = None
+        return df
+
+    def _product_arrays(self, n: int) -> Dict[str, np.ndarray]:
+        # Every random draw of the products table, as numbers and codes
+        rng = self._rng('products')
+        category = rng.choice(len(self.CATEGORIES), n, p=self._zipf(len(self.CATEGORIES), self.category_skew))
+        age_days = rng.integers(0, 720, n)
+        return {
+            'category': category,
+            'age_days': age_days,
+            'manufacturing_date': self.start - age_days.astype('timedelta64[D]'),
+            # Price level depends on the category, so the models have signal to find
+            'price': rng.gamma(2.0, 25.0 * (1 + 0.5 * category)),
+            'quantity': rng.integers(1, 1000, n),
+            'shelf_life_days': rng.integers(30, 1000, n),
+            'last_updated': self.start + rng.integers(0, self.days * 86400, n).astype('timedelta64[s]'),
+            'manufacturer': rng.integers(0, 200, n),
+            'batch_number': rng.integers(0, max(1, n // 50), n),
+            'current_owner': rng.integers(0, 500, n)
+        }
+
+    def products(self, n: Optional[int] = None) -> pd.DataFrame:
+        n = n or self.n_products
+        arrays = self._product_arrays(n)
+        return pd.DataFrame({
+            'product_id': np.arange(n),
+            'name': np.char.add('product-', np.arange(n).astype(str)).astype(object),
+            'manufacturer': np.char.add('maker-', arrays['manufacturer'].astype(str)).astype(object),
+            'manufacturing_date': arrays['manufacturing_date'],
+            'batch_number': np.char.add('B', arrays['batch_number'].astype(str)).astype(object),
+            'current_owner': np.char.add('owner-', arrays['current_owner'].astype(str)).astype(object),
+            'category': np.array(self.CATEGORIES, dtype=object)[arrays['category']],
+            'price': arrays['price'],
+            'quantity': arrays['quantity'],
+            'shelf_life_days': arrays['shelf_life_days'],
+            'age_days': arrays['age_days'],
+            'last_updated': arrays['last_updated']
+        })
+
+    def raw_products(self, n: Optional[int] = None) -> pd.DataFrame:
+        # Products as DataCleaner receives them: exact duplicate rows, category
+        # spelling variants and missing prices and categories
+        rng = self._rng('raw_products')
+        df = self.products(n)[['product_id', 'name', 'category', 'manufacturer', 'current_owner', 'price',
+                               'quantity', 'age_days', 'manufacturing_date']]
+        source = np.arange(len(df))
+        duplicates = rng.random(len(df)) < self.duplicate_rate
+        source[duplicates] = rng.integers(0, len(df), duplicates.sum())
+        df = df.iloc[source].reset_index(drop=True)
+        for category, variant in self.CATEGORY_VARIANTS.items():
+            df.loc[(df['category'] == category).to_numpy() & (rng.random(len(df)) < 0.5), 'category'] = variant
+        return self.inject_missing(df, ['price', 'category'], table='raw_products_missing')
+
+    def _transfer_index(self, n_products: int, n: int) -> Tuple[np.ndarray, np.ndarray, np.random.Generator]:
+        # Product position and date of every transfer; popular products are
+        # transferred far more often than the long tail
+        rng = self._rng('transfers')
+        weights = self._zipf(n_products, self.transfer_skew)[rng.permutation(n_products)]
+        positions = rng.choice(n_products, n, p=weights)
+        dates = self.start + rng.integers(0, self.days * 86400, n).astype('timedelta64[s]')
+        return positions, dates, rng
+
+    def transfers(self, products: pd.DataFrame, n: Optional[int] = None) -> pd.DataFrame:
+        n = n or len(products) * self.transfers_per_product
+        positions, dates, rng = self._transfer_index(len(products), n)
+        location_codes = rng.integers(0, len(self.LOCATIONS), n)
+        coordinates = np.array([(lat, lon) for _, lat, lon in self.LOCATIONS])[location_codes]
+        return pd.DataFrame({
+            'product_id': products['product_id'].to_numpy()[positions],
+            'transfer_date': dates,
+            'from_owner': self._labels('owner-', rng.integers(0, 500, n), 500),
+            'to_owner': self._labels('owner-', rng.integers(0, 500, n), 500),
+            'location': pd.Categorical.from_codes(location_codes, [name for name, _, _ in self.LOCATIONS]),
+            'latitude': coordinates[:, 0] + rng.normal(scale=0.05, size=n),
+            'longitude': coordinates[:, 1] + rng.normal(scale=0.05, size=n)
+        })
+
+    def etl_product_frame(self, n: int) -> pd.DataFrame:
+        # Transfer rows joined with the product columns, as transform_product_data
+        # receives them; no string columns are built, so it scales to tens of
+        # millions of rows
+        n_products = max(1, n // self.transfers_per_product)
+        products = self._product_arrays(n_products)
+        positions, dates, _ = self._transfer_index(n_products, n)
+        return pd.DataFrame({
+            'product_id': positions,
+            'transfer_date': dates,
+            'manufacturing_date': products['manufacturing_date'][positions],
+            'shelf_life_days': products['shelf_life_days'][positions],
+            'price': products['price'][positions],
+            'quantity': products['quantity'][positions]
+        })
+
+    def certifications(self, products: pd.DataFrame, certified_rate: float = 0.6) -> pd.DataFrame:
+        # One certificate per certified product, shaped like the Mongo documents;
+        # use .to_dict('records') for transform_certification_data
+        rng = self._rng('certifications')
+        certified = products['product_id'].to_numpy()[rng.random(len(products)) < certified_rate]
+        n = len(certified)
+        certification_date = self.start - rng.integers(0, 730, n).astype('timedelta64[D]')
+        return pd.DataFrame({
+            '_id': np.char.add('cert-', np.arange(n).astype(str)).astype(object),
+            'product_id': certified,
+            'certification_body': np.array(self.CERTIFICATION_BODIES, dtype=object)[
+                rng.integers(0, len(self.CERTIFICATION_BODIES), n)],
+            'certification_date': certification_date,
+            'expiration_date': certification_date + rng.integers(365, 1095, n).astype('timedelta64[D]')
+        })
+
+    def ethical_scores(self, products: pd.DataFrame, scored_rate: float = 0.5) -> pd.DataFrame:
+        # Each product is assessed in roughly scored_rate of the score categories
+        rng = self._rng('ethical_scores')
+        n_categories = len(self.SCORE_CATEGORIES)
+        assessed = rng.random((len(products), n_categories)) < scored_rate
+        rows, categories = np.nonzero(assessed)
+        n = len(rows)
+        return pd.DataFrame({
+            'product_id': products['product_id'].to_numpy()[rows],
+            'score_category': np.array(self.SCORE_CATEGORIES, dtype=object)[categories],
+            'score': np.clip(rng.normal(55 + 5 * categories, 15), 0, 100),
+            'assessment_date': self.start + rng.integers(0, self.days, n).astype('timedelta64[D]')
+        })
+
+    def dashboard_frame(self, n_products: Optional[int] = None) -> pd.DataFrame:
+        # The joined rows SupplyChainDashboard._dataset_query returns
+        products = self.products(n_products)
+        frame = products.merge(self.certifications(products), on='product_id', how='left') \
+            .merge(self.ethical_scores(products), on='product_id', how='left') \
+            .merge(self.transfers(products), on='product_id', how='left')
+        return frame[['product_id', 'name', 'manufacturer', 'manufacturing_date', 'batch_number', 'current_owner',
+                      'category', 'price', 'quantity', 'last_updated', 'certification_body',
+                      'certification_date', 'expiration_date', 'score_category', 'score', 'assessment_date',
+                      'transfer_date', 'from_owner', 'to_owner', 'location', 'latitude', 'longitude']]
+
+    def model_frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        # cleaned_products rows with the features and target both models use.
+        # The target depends on the features and category, plus noise.
+        products = self.products(n)
+        rng = self._rng('model_frame')
+        category_codes = pd.Categorical(products['category'], categories=self.CATEGORIES).codes
+        avg_transfer_days = rng.gamma(2.0, 1.0 + 0.3 * category_codes + products['quantity'].to_numpy() / 500)
+        target = (0.8 * avg_transfer_days + 0.01 * products['age_days'].to_numpy()
+                  + 5 * np.log1p(products['price'].to_numpy() / 100) + rng.normal(scale=0.5, size=len(products)))
+        return pd.DataFrame({
+            'product_id': products['product_id'],
+            'age_days': products['age_days'],
+            'price': products['price'],
+            'quantity': products['quantity'],
+            'avg_transfer_time': pd.to_timedelta(avg_transfer_days, unit='D'),
+            'category': products['category'],
+            'last_updated': products['last_updated'],
+            'days_until_next_transfer': target
+        })
+
+    def iot_events(self, n: int, n_devices: Optional[int] = None) -> pd.DataFrame:
+        # Readings as the Raspberry Pi devices publish them, interleaved across
+        # devices one second apart, with sensor read failures as missing values
+        rng = self._rng('iot_events')
+        n_devices = n_devices or self.config.get('n_devices', 20)
+        device = rng.integers(0, n_devices, n)
+        events = pd.DataFrame({
+            'device_id': self._labels('raspberry-pi-', device, n_devices).astype(object),
+            'timestamp': self.start + np.arange(n).astype('timedelta64[s]'),
+            'distance': 100 + device + rng.normal(size=n),
+            'motion': rng.random(n) < 0.1,
+            'temperature': 20 + rng.normal(scale=0.5, size=n),
+            'humidity': 50 + rng.normal(size=n),
+            'weight': 1000 + 10 * device + rng.normal(scale=5, size=n)
+        })
+        return self.inject_missing(events, ['temperature', 'humidity'], table='iot_events_missing')
+
+    def generate(self) -> Dict[str, pd.DataFrame]:
+        products = self.products()
+        return {
+            'products': products,
+            'transfers': self.transfers(products),
+            'certifications': self.certifications(products),
+            'ethical_scores': self.ethical_scores(products),
+            'iot_readings': self.iot_events(self.n_products * self.transfers_per_product),
+            'cleaned_products': self.model_frame()
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic supply-chain data")
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--transfers-per-product', type=int, default=8)
+    parser.add_argument('--category-skew', type=float, default=1.0)
+    parser.add_argument('--transfer-skew', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--staging-root', help="stage products and cleaned_products for the model examples")
+    parser.add_argument('--csv-dir', help="write every table as CSV")
+    args = parser.parse_args()
+
+    generator = SupplyChainDataGenerator({'n_products': args.products,
+                                          'transfers_per_product': args.transfers_per_product,
+                                          'category_skew': args.category_skew,
+                                          'transfer_skew': args.transfer_skew,
+                                          'seed': args.seed})
+    tables = generator.generate()
+    for name, df in tables.items():
+        logger.info(f"{name}: {len(df):,} rows")
+
+    if args.staging_root:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+        from data_processing.staging import StagingStore
+
+        store = StagingStore({'staging_root': args.staging_root})
+        store.write(tables['products'], 'products', 'last_updated')
+        store.write(tables['cleaned_products'], 'cleaned_products', 'last_updated')
+    if args.csv_dir:
+        os.makedirs(args.csv_dir, exist_ok=True)
+        for name, df in tables.items():
+            df.to_csv(os.path.join(args.csv_dir, f"{name}.csv"), index=False)
@@ -2,41 +2,100 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Iterator, Optional
 import logging
+import time
+import tracemalloc
 from sklearn.impute import KNNImputer
 from sklearn.preprocessing import StandardScaler
 from scipy import stats
+import os
+import sys
+
+# Run as a script: make the analytics/src packages importable
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_processing.staging import StagingStore  # noqa: E402
+from data_processing.imputation import BaseImputer, make_imputer  # noqa: E402
+from data_processing.sketches import QuantileSketch  # noqa: E402
+from data_processing.fingerprints import FingerprintIndex, FingerprintSet  # noqa: E402
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class DataCleaner:
+    CATEGORICAL_COLUMNS = ['category', 'name', 'manufacturer', 'current_owner', 'location']
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
+        self.memory_profile = []
+        self.imputer = BaseImputer.load(config['imputer_path']) if config.get('imputer_path') else None
+        # Keys of rows cleaned by earlier runs; new keys are held until the output is written
+        self.fingerprints = FingerprintIndex(config['fingerprint_path']) if config.get('fingerprint_path') else None
+        self._pending_fingerprints = []
 
     def remove_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
         initial_rows = len(df)
         df.drop_duplicates(inplace=True)
+        df = self._drop_previously_seen(df)
         removed_rows = initial_rows - len(df)
         logger.info(f"Removed {removed_rows} duplicate rows")
         return df
 
-    def handle_missing_values(self, df: pd.DataFrame) -> pd.DataFrame:
-        # For numerical columns, use KNN imputation
-        num_cols = df.select_dtypes(include=[np.number]).columns
-        knn_imputer = KNNImputer(n_neighbors=5)
-        df[num_cols] = knn_imputer.fit_transform(df[num_cols])
+    def _drop_previously_seen(self, df: pd.DataFrame, record: bool = True) -> pd.DataFrame:
+        if self.fingerprints is None:
+            return df
+        hashes = FingerprintSet.hash_rows(df, self.config.get('fingerprint_columns'))
+        keep = ~self.fingerprints.contains(hashes)
+        if record:
+            self._pending_fingerprints.append(hashes[keep])
+        return df[keep]
+
+    def commit_fingerprints(self):
+        # Call once the cleaned rows are stored, so a failed run is cleaned again in full
+        if self.fingerprints is None or not self._pending_fingerprints:
+            return
+        with self.fingerprints.lock:
+            self.fingerprints.add(np.concatenate(self._pending_fingerprints))
+            self.fingerprints.save()
+        self._pending_fingerprints = []
+
+    def handle_missing_values(self, df: pd.DataFrame, strategy: Optional[str] = None,
+                              categorical_fill: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        strategy = strategy or self.config.get('imputation_strategy', 'knn')
+        if strategy == 'knn':
+            # For numerical columns, use KNN imputation
+            num_cols = df.select_dtypes(include=[np.number]).columns
+            knn_imputer = KNNImputer(n_neighbors=5)
+            df[num_cols] = knn_imputer.fit_transform(df[num_cols])
+        else:
+            # Fit once on the first batch, then reuse the fitted imputer
+            if self.imputer is None:
+                self.imputer = make_imputer(strategy, self.config.get('imputation_params')).fit(
+                    df, self._imputation_columns(df))
+            imputed = self.imputer.transform(df)
+            # State carried to the next batch only ever comes from earlier batches
+            self.imputer.update(df)
+            df = imputed
 
         # For categorical columns, use mode imputation
-        cat_cols = df.select_dtypes(include=['object']).columns
-        for col in cat_cols:
-            df[col].fillna(df[col].mode()[0], inplace=True)
+        cat_cols = df.select_dtypes(include=['object', 'category']).columns
+        if categorical_fill is None:
+            fill_values = {col: df[col].mode()[0] for col in cat_cols if df[col].isna().any()}
+        else:
+            fill_values = {col: categorical_fill[col] for col in cat_cols if col in categorical_fill}
+        if fill_values:
+            df = df.fillna(fill_values)
 
         logger.info("Handled missing values")
         return df
 
+    def save_imputer(self, filepath: str):
+        if self.imputer is None:
+            raise ValueError("Imputer has not been fitted yet.")
+        self.imputer.save(filepath)
+
     def remove_outliers(self, df: pd.DataFrame, columns: list) -> pd.DataFrame:
         for col in columns:
             Q1 = df[col].quantile(0.25)
@@ -49,6 +108,31 @@ class DataCleaner:
         logger.info(f"Removed outliers from columns: {columns}")
         return df
 
+    def remove_outliers_combined(self, df: pd.DataFrame, columns: list) -> pd.DataFrame:
+        # All IQR bounds come from one quantile pass over the unfiltered frame,
+        # and a single combined mask makes one filtered copy instead of one per column
+        quantiles = df[columns].quantile([0.25, 0.75])
+        iqr = quantiles.loc[0.75] - quantiles.loc[0.25]
+        lower_bounds = quantiles.loc[0.25] - 1.5 * iqr
+        upper_bounds = quantiles.loc[0.75] + 1.5 * iqr
+
+        values = df[columns].to_numpy()
+        mask = ((values >= lower_bounds.to_numpy()) & (values <= upper_bounds.to_numpy())).all(axis=1)
+        logger.info(f"Removed {len(df) - int(mask.sum())} outlier rows from columns: {columns}")
+        return df[mask]
+
+    def optimize_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        max_category_ratio = self.config.get('max_category_ratio', 0.5)
+        categorical_columns = self.config.get('categorical_columns', self.CATEGORICAL_COLUMNS)
+        for col in df.select_dtypes(include=['object']).columns:
+            if col in categorical_columns or df[col].nunique() <= max_category_ratio * len(df):
+                df[col] = df[col].astype('category')
+        for col in df.select_dtypes(include=['integer']).columns:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        for col in df.select_dtypes(include=['floating']).columns:
+            df[col] = pd.to_numeric(df[col], downcast='float')
+        return df
+
     def normalize_data(self, df: pd.DataFrame, columns: list) -> pd.DataFrame:
         scaler = StandardScaler()
         df[columns] = scaler.fit_transform(df[columns])
@@ -56,7 +140,15 @@ class DataCleaner:
         return df
 
     def handle_inconsistent_categories(self, df: pd.DataFrame, column: str, mapping: Dict[str, str]) -> pd.DataFrame:
-        df[column] = df[column].replace(mapping)
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            # Relabel the categories rather than rewriting every row
+            renamed = df[column].cat.categories.map(lambda value: mapping.get(value, value))
+            if renamed.is_unique:
+                df[column] = df[column].cat.rename_categories(renamed)
+            else:
+                df[column] = df[column].astype(object).replace(mapping).astype('category')
+        else:
+            df[column] = df[column].replace(mapping)
         logger.info(f"Handled inconsistent categories in column: {column}")
         return df
 
@@ -70,8 +162,39 @@ class DataCleaner:
                     logger.warning(f"Could not convert {col} to {expected_type}")
         return df
 
+    def _run_step(self, name: str, step: Callable[..., pd.DataFrame], df: pd.DataFrame, *args) -> pd.DataFrame:
+        if not self.config.get('track_memory', False):
+            return step(df, *args)
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        start_current, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        df = step(df, *args)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        if not tracing:
+            tracemalloc.stop()
+
+        profile = {
+            'step': name,
+            'seconds': elapsed,
+            'peak_mb': (peak - start_current) / 1024 ** 2,
+            'frame_mb': df.memory_usage(deep=True).sum() / 1024 ** 2
+        }
+        self.memory_profile.append(profile)
+        logger.info(f"{name}: {elapsed:.2f}s, peak +{profile['peak_mb']:.1f} MB, frame {profile['frame_mb']:.1f} MB")
+        return df
+
     def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.config.get('memory_efficient', False):
+            return self.clean_data_efficient(df)
+
         df = self.remove_duplicates(df)
+        if df.empty:
+            return df
         df = self.handle_missing_values(df)
         df = self.remove_outliers(df, ['age_days', 'price', 'quantity'])
         df = self.normalize_data(df, ['age_days', 'price', 'quantity'])
@@ -89,17 +212,195 @@ class DataCleaner:
         
         return df
 
+    def clean_data_efficient(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Shrinks dtypes before the heavy steps so every later copy is smaller
+        numeric_columns = ['age_days', 'price', 'quantity']
+        self.memory_profile = []
+        df = self._run_step('remove_duplicates', self.remove_duplicates, df)
+        if df.empty:
+            return df
+        df = self._run_step('optimize_dtypes', self.optimize_dtypes, df)
+        df = self._run_step('handle_missing_values', self.handle_missing_values, df)
+        df = self._run_step('remove_outliers', self.remove_outliers_combined, df, numeric_columns)
+        df = self._run_step('normalize_data', self.normalize_data, df, numeric_columns)
+        df = self._run_step('handle_inconsistent_categories', self.handle_inconsistent_categories, df,
+                            'category', {'Electronics': 'electronic', 'electronic': 'Electronics'})
+        df = self._run_step('downcast', self.optimize_dtypes, df)
+
+        # product_id keeps the width optimize_dtypes chose from its range; a
+        # fixed int32 would wrap ids at or above 2**31
+        expected_types = {
+            'name': 'category',
+            'category': 'category',
+            'price': 'float32',
+            'quantity': 'float32',
+            'manufacturing_date': 'datetime64[ns]'
+        }
+        df = self._run_step('validate_data_types', self.validate_data_types, df, expected_types)
+        return df
+
+    def _chunk_strategy(self) -> str:
+        # Whole-frame KNN cannot be applied chunk by chunk; use a fit-once strategy
+        strategy = self.config.get('imputation_strategy', 'knn')
+        return self.config.get('chunked_imputation_strategy', 'grouped_median') if strategy == 'knn' else strategy
+
+    def _imputation_columns(self, df: pd.DataFrame) -> list:
+        exclude = self.config.get('imputation_exclude', ['product_id'])
+        return [col for col in df.select_dtypes(include=[np.number]).columns if col not in exclude]
+
+    def collect_chunk_statistics(self, chunks: Iterator[pd.DataFrame], columns: list) -> Dict[str, Any]:
+        # Pass 1: mergeable statistics only, nothing but sketches, hashes and a
+        # bounded imputation sample is kept. The imputer is fitted from them at
+        # the end of the pass and is not run on any chunk here, so pass 2 starts
+        # from the fitted state, not from whatever the last chunk left behind.
+        accuracy = self.config.get('sketch_relative_accuracy', 0.01)
+        category_counts = {}
+        integer_ranges = {}
+        float_columns = set()
+        imputer = self.imputer or make_imputer(self._chunk_strategy(), self.config.get('imputation_params'))
+        imputation = None
+        seen = FingerprintSet()
+        rows = unique_rows = 0
+
+        for chunk in chunks:
+            rows += len(chunk)
+            hashes = FingerprintSet.hash_rows(chunk)
+            keep = seen.first_seen_mask(hashes)
+            seen.add(hashes[keep])
+            chunk = self._drop_previously_seen(chunk[keep], record=False)
+            unique_rows += len(chunk)
+
+            for col in chunk.select_dtypes(include=['object', 'category']).columns:
+                counts = chunk[col].value_counts()
+                category_counts[col] = counts if col not in category_counts else \
+                    category_counts[col].add(counts, fill_value=0)
+            for col in chunk.select_dtypes(include=['integer']).columns:
+                if len(chunk):
+                    low, high = integer_ranges.get(col, (chunk[col].min(), chunk[col].max()))
+                    integer_ranges[col] = (min(low, chunk[col].min()), max(high, chunk[col].max()))
+            float_columns.update(chunk.select_dtypes(include=['floating']).columns)
+
+            if imputation is None:
+                imputed_columns = imputer.columns if imputer.is_fitted else self._imputation_columns(chunk)
+                imputation = imputer.statistics(imputed_columns, accuracy)
+            imputation.add(chunk)
+
+        if imputation is None:
+            imputation = imputer.statistics(imputer.columns or columns, accuracy)
+        if not imputer.is_fitted:
+            imputer.fit_statistics(imputation)
+        self.imputer = imputer
+
+        # Outlier bounds and scaling see the values after imputation: the
+        # observed values plus what the imputer writes into each gap
+        bounds = {}
+        scaling = {}
+        for col in columns:
+            sketch = QuantileSketch(accuracy)
+            sketch.merge(imputation.sketches[col])
+            for value, count in imputer.estimated_fills(imputation, col):
+                if count and not np.isnan(value):
+                    sketch.add(np.full(count, value))
+            q1, q3 = sketch.quantile(0.25), sketch.quantile(0.75)
+            iqr = q3 - q1
+            bounds[col] = (q1 - 1.5 * iqr, q3 + 1.5 * iqr)
+            _, mean, std = sketch.moments(*bounds[col])
+            scaling[col] = (mean, std if std > 0 else 1.0)
+
+        logger.info(f"Chunk statistics: {rows} rows, {rows - unique_rows} duplicates, bounds {bounds}")
+        return {
+            'rows': rows,
+            'unique_rows': unique_rows,
+            'bounds': bounds,
+            'scaling': scaling,
+            'categorical_fill': {col: counts.idxmax() for col, counts in category_counts.items() if len(counts)},
+            'category_values': {col: counts.index for col, counts in category_counts.items()},
+            'integer_ranges': integer_ranges,
+            'float_columns': float_columns
+        }
+
+    def chunk_schema(self, chunk_stats: Dict[str, Any], scaled_columns: list,
+                     mapping: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+        # One dtype per column for every chunk, from pass-1 global statistics:
+        # optimize_dtypes on each chunk alone picks different integer widths and
+        # category dictionaries, and the staged chunks must share one schema
+        max_category_ratio = self.config.get('max_category_ratio', 0.5)
+        categorical_columns = self.config.get('categorical_columns', self.CATEGORICAL_COLUMNS)
+        schema = {col: np.float32 for col in set(scaled_columns) | chunk_stats['float_columns']}
+        for col, (low, high) in chunk_stats['integer_ranges'].items():
+            if col not in schema:
+                schema[col] = next(dtype for dtype in (np.int8, np.int16, np.int32, np.int64)
+                                   if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max)
+        for col, values in chunk_stats['category_values'].items():
+            if col in categorical_columns or len(values) <= max_category_ratio * chunk_stats['unique_rows']:
+                if col in mapping:
+                    values = values.map(lambda value: mapping[col].get(value, value))
+                schema[col] = pd.CategoricalDtype(values.unique())
+        return schema
+
+    def clean_data_chunked(self, chunk_source: Callable[[], Iterator[pd.DataFrame]]) -> Iterator[pd.DataFrame]:
+        # Two passes over a re-iterable chunk source. Output matches clean_data_efficient
+        # up to the sketch accuracy: IQR bounds within sketch_relative_accuracy, and
+        # scaling statistics taken over each column's in-bounds values (rows removed
+        # only because another column was an outlier still count towards them).
+        numeric_columns = ['age_days', 'price', 'quantity']
+        category_mapping = {'category': {'Electronics': 'electronic', 'electronic': 'Electronics'}}
+        chunk_stats = self.collect_chunk_statistics(chunk_source(), numeric_columns)
+        lower = np.array([chunk_stats['bounds'][col][0] for col in numeric_columns])
+        upper = np.array([chunk_stats['bounds'][col][1] for col in numeric_columns])
+        means = np.array([chunk_stats['scaling'][col][0] for col in numeric_columns])
+        stds = np.array([chunk_stats['scaling'][col][1] for col in numeric_columns])
+        schema = self.chunk_schema(chunk_stats, numeric_columns, category_mapping)
+
+        # Pass 2: apply the global decisions chunk by chunk
+        seen = FingerprintSet()
+        strategy = self._chunk_strategy()
+        for chunk in chunk_source():
+            hashes = FingerprintSet.hash_rows(chunk)
+            keep = seen.first_seen_mask(hashes)
+            seen.add(hashes[keep])
+            chunk = self.handle_missing_values(self._drop_previously_seen(chunk[keep]), strategy=strategy,
+                                               categorical_fill=chunk_stats['categorical_fill'])
+
+            values = chunk[numeric_columns].to_numpy(dtype=np.float64)
+            inside = ((values >= lower) & (values <= upper)).all(axis=1)
+            chunk = chunk[inside].copy()
+            chunk[numeric_columns] = ((values[inside] - means) / stds).astype(np.float32)
+
+            chunk = self.handle_inconsistent_categories(chunk, 'category', category_mapping['category'])
+            yield chunk.astype({col: dtype for col, dtype in schema.items() if col in chunk.columns})
+
+    def clean_staged_data(self, store: StagingStore, source: str, target: str,
+                          filters: list = None, date_column: str = 'last_updated') -> Optional[pd.DataFrame]:
+        if self.config.get('chunked', False):
+            # Out-of-core: stream batches from the store and write each cleaned chunk
+            rows = 0
+            batch_size = self.config.get('chunk_size', 500000)
+            for cleaned_chunk in self.clean_data_chunked(lambda: store.iter_batches(source, filters=filters,
+                                                                                     batch_size=batch_size)):
+                store.write(cleaned_chunk, target, date_column)
+                rows += len(cleaned_chunk)
+            self.commit_fingerprints()
+            logger.info(f"Cleaned {rows} rows from {source} into {target} in chunked mode")
+            return None
+
+        df = store.read(source, filters=filters)
+        cleaned_df = self.clean_data(df)
+        if len(cleaned_df):
+            store.write(cleaned_df, target, date_column)
+        self.commit_fingerprints()
+        return cleaned_df
+
 if __name__ == "__main__":
     # Example usage
-    config = {}  # Add any necessary configuration
+    config = {
+        'staging_root': 'staging',
+        'fingerprint_path': 'fingerprints/cleaned_products',
+        'fingerprint_columns': ['product_id', 'last_updated']
+    }
     cleaner = DataCleaner(config)
+    store = StagingStore(config)
     
-    # Load your data
-    df = pd.read_csv('your_data.csv')
-    
-    # Clean the data
-    cleaned_df = cleaner.clean_data(df)
-    
-    # Save the cleaned data
-    cleaned_df.to_csv('cleaned_data.csv', index=False)
+    # Clean the staged products for one day and stage the result
+    cleaner.clean_staged_data(store, 'products', 'cleaned_products', filters=[('date', '=', '2024-01-01')])
     logger.info("Data cleaning process completed")
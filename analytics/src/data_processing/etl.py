@@ -5,27 +5,86 @@ import numpy as np
 from sqlalchemy import create_engine
 from pymongo import MongoClient
 from kafka import KafkaConsumer
+import io
+import json
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict, Any
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Callable, Iterator, Tuple, Union
 from datetime import datetime, timedelta
 
+# Run as a script: make the analytics/src packages importable
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_processing.fingerprints import FingerprintIndex  # noqa: E402
+from data_processing.staging import StagingStore  # noqa: E402
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+class MemoryBudget:
+    def __init__(self, limit_bytes: int):
+        self.limit_bytes = limit_bytes
+        self.in_use = 0
+        self.peak = 0
+        self.waits = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, nbytes: int, stop: threading.Event) -> bool:
+        # Blocks the producer until enough in-flight chunks have been loaded.
+        # A single chunk larger than the budget is still admitted on its own
+        # so the pipeline cannot deadlock.
+        with self._cond:
+            waited = False
+            while self.in_use > 0 and self.in_use + nbytes > self.limit_bytes:
+                if stop.is_set():
+                    return False
+                waited = True
+                self._cond.wait(timeout=0.5)
+            if waited:
+                self.waits += 1
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+            return True
+
+    def release(self, nbytes: int):
+        with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
 class SupplyChainETL:
+    # NULL marker for COPY loads, so empty strings are not read back as NULL
+    COPY_NULL = '\\N'
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.sql_engine = create_engine(config['sql_connection_string'])
         self.mongo_client = MongoClient(config['mongo_connection_string'])
-        self.kafka_consumer = KafkaConsumer(
-            config['kafka_topic'],
-            bootstrap_servers=config['kafka_bootstrap_servers'],
-            auto_offset_reset='earliest',
-            enable_auto_commit=True,
-            group_id=config['kafka_consumer_group']
-        )
+        self._kafka_consumer = None
+        self.staging_store = StagingStore(config) if config.get('staging_root') else None
+        self.load_stats = {}
+        self._load_stats_lock = threading.Lock()
+        self._fingerprint_indexes = {}
+        self._fingerprint_lock = threading.Lock()
+
+    @property
+    def kafka_consumer(self) -> KafkaConsumer:
+        # Connected on first use so transforms and loads can run without a broker
+        if self._kafka_consumer is None:
+            self._kafka_consumer = KafkaConsumer(
+                self.config['kafka_topic'],
+                bootstrap_servers=self.config['kafka_bootstrap_servers'],
+                auto_offset_reset='earliest',
+                # Offsets are committed only after a batch has been loaded
+                enable_auto_commit=False,
+                group_id=self.config['kafka_consumer_group']
+            )
+        return self._kafka_consumer
 
     def extract_sql_data(self, query: str) -> pd.DataFrame:
         try:
@@ -42,28 +101,258 @@ class SupplyChainETL:
             logger.error(f"Error extracting MongoDB data: {str(e)}")
             raise
 
+    def stream_sql_data(self, query: str, chunksize: int) -> Iterator[pd.DataFrame]:
+        # Server-side cursor so the driver does not buffer the whole result set
+        with self.sql_engine.connect().execution_options(stream_results=True) as conn:
+            for chunk in pd.read_sql(query, conn, chunksize=chunksize):
+                yield chunk
+
+    def stream_mongo_data(self, collection: str, query: Dict[str, Any], batch_size: int) -> Iterator[pd.DataFrame]:
+        db = self.mongo_client[self.config['mongo_db_name']]
+        cursor = db[collection].find(query, batch_size=batch_size)
+        try:
+            while True:
+                batch = [doc for _, doc in zip(range(batch_size), cursor)]
+                if not batch:
+                    break
+                yield pd.DataFrame(batch)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def complete_product_groups(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        # Per-product transforms need all of a product's rows in one chunk.
+        # Input is ordered by product_id, so only the trailing product of each
+        # chunk can continue into the next one; hold it back until it does not.
+        carry = None
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            tail = (chunk['product_id'] == chunk['product_id'].iloc[-1]).to_numpy()
+            carry = chunk[tail]
+            if not tail.all():
+                yield chunk[~tail]
+        if carry is not None and not carry.empty:
+            yield carry
+
+    @staticmethod
+    def _estimate_nbytes(chunk: Union[pd.DataFrame, List[Dict[str, Any]]]) -> int:
+        if isinstance(chunk, pd.DataFrame):
+            return int(chunk.memory_usage(deep=True).sum())
+        return sys.getsizeof(chunk) + sum(sys.getsizeof(item) for item in chunk)
+
+    def _run_stream(self, name: str, chunks: Iterator, process: Callable[[Any], None],
+                    budget: MemoryBudget) -> Dict[str, Any]:
+        # The producer thread extracts ahead of the consumer only as far as the
+        # shared memory budget allows
+        pending = queue.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                for chunk in chunks:
+                    nbytes = self._estimate_nbytes(chunk)
+                    if not budget.acquire(nbytes, stop):
+                        return
+                    pending.put((chunk, nbytes))
+            except Exception as e:
+                pending.put(e)
+            finally:
+                pending.put(done)
+
+        producer = threading.Thread(target=produce, name=f"etl-extract-{name}", daemon=True)
+        producer.start()
+
+        start = time.perf_counter()
+        rows = chunk_count = 0
+        try:
+            while True:
+                item = pending.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                chunk, nbytes = item
+                try:
+                    process(chunk)
+                finally:
+                    budget.release(nbytes)
+                rows += len(chunk)
+                chunk_count += 1
+        finally:
+            stop.set()
+        elapsed = time.perf_counter() - start
+        logger.info(f"Streamed {rows} rows in {chunk_count} chunks for {name} in {elapsed:.2f}s")
+        return {'rows': rows, 'chunks': chunk_count, 'seconds': elapsed}
+
+    def poll_kafka_batch(self, max_records: int, linger_ms: int) -> List[Any]:
+        # Accumulate until the batch is full or the linger window has elapsed
+        values = []
+        deadline = time.monotonic() + linger_ms / 1000.0
+        while len(values) < max_records:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            records = self.kafka_consumer.poll(timeout_ms=remaining_ms, max_records=max_records - len(values))
+            values.extend(message.value for messages in records.values() for message in messages)
+        return values
+
     def extract_kafka_data(self, timeout_ms: int = 10000) -> List[Dict[str, Any]]:
         messages = []
         try:
-            for message in self.kafka_consumer:
-                messages.append(message.value)
-                if self.kafka_consumer.poll(timeout_ms=timeout_ms) == {}:
+            while True:
+                batch = self.poll_kafka_batch(self.config.get('kafka_max_records', 500), timeout_ms)
+                if not batch:
                     break
+                messages.extend(batch)
         except Exception as e:
+            # Re-raised so the stage fails and the batch's offsets are never
+            # committed; the next run consumes it again
             logger.error(f"Error extracting Kafka data: {str(e)}")
+            raise
         return messages
 
+    def kafka_consumer_lag(self) -> int:
+        partitions = list(self.kafka_consumer.assignment())
+        if not partitions:
+            return 0
+        end_offsets = self.kafka_consumer.end_offsets(partitions)
+        return sum(max(0, end_offsets[tp] - self.kafka_consumer.position(tp)) for tp in partitions)
+
+    def rewind_kafka_consumer(self):
+        # Moves every assigned partition back to its last committed offset
+        for tp in self.kafka_consumer.assignment():
+            committed = self.kafka_consumer.committed(tp)
+            if committed is None:
+                self.kafka_consumer.seek_to_beginning(tp)
+            else:
+                self.kafka_consumer.seek(tp, committed)
+
+    def consume_kafka_batches(self, max_batches: int = None, stop_when_idle: bool = False) -> Dict[str, Any]:
+        max_records = self.config.get('kafka_max_records', 500)
+        linger_ms = self.config.get('kafka_linger_ms', 1000)
+        metrics_interval = self.config.get('kafka_metrics_interval', 10)
+        max_retries = self.config.get('kafka_max_retries', 3)
+        failures = 0
+        stats = {'messages': 0, 'skipped': 0, 'batches': 0, 'seconds': 0.0, 'lag': None}
+
+        start = time.perf_counter()
+        while max_batches is None or stats['batches'] < max_batches:
+            batch = self.poll_kafka_batch(max_records, linger_ms)
+            if not batch:
+                if stop_when_idle:
+                    break
+                continue
+
+            try:
+                skipped = self.process_kafka_data(batch)
+            except Exception as e:
+                # Only loads and commits fail here; nothing was committed, so
+                # rewinding replays the same batch
+                failures += 1
+                logger.error(f"Kafka batch of {len(batch)} messages failed "
+                             f"(attempt {failures} of {max_retries + 1}): {str(e)}")
+                if failures > max_retries:
+                    raise
+                self.rewind_kafka_consumer()
+                continue
+            failures = 0
+            stats['messages'] += len(batch)
+            stats['skipped'] += skipped
+            stats['batches'] += 1
+
+            if stats['batches'] % metrics_interval == 0:
+                elapsed = time.perf_counter() - start
+                stats['lag'] = self.kafka_consumer_lag()
+                logger.info(f"Kafka consumer: {stats['messages']} messages in {stats['batches']} batches, "
+                            f"{stats['messages'] / elapsed:.0f} msg/s, lag {stats['lag']}")
+
+        stats['seconds'] = time.perf_counter() - start
+        stats['messages_per_second'] = stats['messages'] / stats['seconds'] if stats['seconds'] else 0.0
+        stats['lag'] = self.kafka_consumer_lag()
+        logger.info(f"Kafka consumer finished: {stats['messages']} messages ({stats['skipped']} skipped), "
+                    f"{stats['messages_per_second']:.0f} msg/s, lag {stats['lag']}")
+        return stats
+
     def transform_product_data(self, data: pd.DataFrame) -> pd.DataFrame:
-        # Implement complex transformations here
         data['manufacturing_date'] = pd.to_datetime(data['manufacturing_date'])
-        data['age_days'] = (datetime.now() - data['manufacturing_date']).dt.days
-        data['is_expired'] = data['age_days'] > data['shelf_life_days']
-        
-        # Calculate average time between transfers
-        transfer_times = data.groupby('product_id')['transfer_date'].diff().mean()
-        data['avg_transfer_time'] = data['product_id'].map(transfer_times)
-        
-        # Implement more transformations as needed
+        data['transfer_date'] = pd.to_datetime(data['transfer_date'])
+
+        # Sort once so each product's transfers are contiguous and in order;
+        # every per-product statistic below is then a single vectorised pass
+        if pd.api.types.is_numeric_dtype(data['product_id']):
+            order = np.lexsort((data['transfer_date'].to_numpy('datetime64[ns]').view(np.int64),
+                                data['product_id'].to_numpy()))
+            data = data.take(order).reset_index(drop=True)
+        else:
+            data = data.sort_values(['product_id', 'transfer_date'], kind='mergesort', ignore_index=True)
+
+        now = pd.Timestamp.now(tz=data['manufacturing_date'].dt.tz)
+        data['age_days'] = (now - data['manufacturing_date']).dt.days
+        data['is_expired'] = (data['age_days'] > data['shelf_life_days']).to_numpy()
+
+        # Calculate per-product time between transfers
+        data = data.join(self._transfer_interval_stats(data))
+
+        if self.config.get('etl_downcast', True):
+            data = self.downcast_numeric(data, self.config.get('etl_float32_columns', []))
+        return data
+
+    @staticmethod
+    def _transfer_interval_stats(data: pd.DataFrame) -> pd.DataFrame:
+        product_ids = data['product_id'].to_numpy()
+        n = len(product_ids)
+        if n == 0:
+            return pd.DataFrame({'avg_transfer_time': pd.Series(dtype='timedelta64[ns]'),
+                                 'max_transfer_gap': pd.Series(dtype='timedelta64[ns]'),
+                                 'transfer_count': pd.Series(dtype='int32')}, index=data.index)
+
+        new_group = np.empty(n, dtype=bool)
+        new_group[0] = True
+        np.not_equal(product_ids[1:], product_ids[:-1], out=new_group[1:])
+        codes = np.cumsum(new_group) - 1
+        starts = np.flatnonzero(new_group)
+
+        # Gaps between consecutive transfers of the same product, in nanoseconds
+        transfer_ns = data['transfer_date'].to_numpy('datetime64[ns]').view(np.int64)
+        has_date = transfer_ns != np.iinfo(np.int64).min
+        gaps = np.zeros(n, dtype=np.int64)
+        gaps[1:] = transfer_ns[1:] - transfer_ns[:-1]
+        valid = ~new_group
+        valid[1:] &= has_date[1:] & has_date[:-1]
+
+        gap_counts = np.bincount(codes, weights=valid)
+        gap_sums = np.bincount(codes, weights=np.where(valid, gaps, 0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_gaps = gap_sums / gap_counts
+        max_gaps = np.maximum.reduceat(np.where(valid, gaps, -1), starts)
+        transfer_counts = np.bincount(codes, weights=has_date)
+
+        nat = np.iinfo(np.int64).min
+        mean_ns = np.where(np.isnan(mean_gaps), nat, np.nan_to_num(mean_gaps).round().astype(np.int64))
+        max_ns = np.where(max_gaps < 0, nat, max_gaps)
+        return pd.DataFrame({
+            'avg_transfer_time': mean_ns[codes].view('timedelta64[ns]'),
+            'max_transfer_gap': max_ns[codes].view('timedelta64[ns]'),
+            'transfer_count': transfer_counts[codes].astype(np.int32)
+        }, index=data.index)
+
+    @staticmethod
+    def downcast_numeric(data: pd.DataFrame, float32_columns: List[str] = ()) -> pd.DataFrame:
+        # Narrow to 32-bit rather than the smallest fitting type, so every chunk
+        # of a streamed load maps to the same SQL column types
+        int32 = np.iinfo(np.int32)
+        for col in data.select_dtypes(include=[np.int64]).columns:
+            values = data[col]
+            if values.empty or (values.min() >= int32.min and values.max() <= int32.max):
+                data[col] = values.astype(np.int32)
+        # float32 keeps only about 7 significant digits, so prices and
+        # coordinates stay float64; only explicitly listed columns are narrowed
+        for col in data.select_dtypes(include=[np.float64]).columns.intersection(list(float32_columns)):
+            data[col] = data[col].astype(np.float32)
         return data
 
     def transform_certification_data(self, data: List[Dict[str, Any]]) -> pd.DataFrame:
@@ -78,39 +367,280 @@ class SupplyChainETL:
         # Implement more transformations as needed
         return df
 
-    def load_data(self, data: pd.DataFrame, table_name: str):
+    def transform_event_data(self, events: List[Dict[str, Any]]) -> pd.DataFrame:
+        df = pd.DataFrame(events)
+        if df.empty:
+            return df
+        if 'timestamp' in df.columns:
+            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+        for col in ['temperature', 'humidity', 'distance', 'weight']:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        if 'motion' in df.columns:
+            df['motion'] = df['motion'].fillna(False).astype(bool)
+        return df
+
+    def fingerprint_index(self, table_name: str) -> Union[FingerprintIndex, None]:
+        # One persistent key index per target table, shared by all loader threads
+        if not self.config.get('fingerprint_root'):
+            return None
+        with self._fingerprint_lock:
+            index = self._fingerprint_indexes.get(table_name)
+            if index is None:
+                index = FingerprintIndex(os.path.join(self.config['fingerprint_root'], table_name))
+                self._fingerprint_indexes[table_name] = index
+            return index
+
+    def load_data(self, data: pd.DataFrame, table_name: str) -> pd.DataFrame:
+        # Returns the rows that were actually written
+        index = self.fingerprint_index(table_name)
+        if index is None:
+            self._load_table(data, table_name)
+            return data
+
+        # Rows already loaded by an earlier run are skipped; keys are recorded
+        # only after the load succeeds so a failed batch is retried in full
+        keys = self.config.get('dedup_keys', {}).get(table_name)
+        with index.lock:
+            data = index.filter_new(data, keys)
+            if len(data) == 0:
+                logger.info(f"No new rows to load into {table_name}")
+                return data
+            self._load_table(data, table_name)
+            index.commit(data, keys)
+        return data
+
+    def _load_table(self, data: pd.DataFrame, table_name: str):
         try:
-            data.to_sql(table_name, self.sql_engine, if_exists='append', index=False)
-            logger.info(f"Successfully loaded {len(data)} rows into {table_name}")
+            start = time.perf_counter()
+            method = self.config.get('load_method', 'auto')
+            data = self.sql_frame(data)
+            if method == 'copy' or (method == 'auto' and self.sql_engine.dialect.name == 'postgresql'):
+                self._copy_load(data, table_name)
+            else:
+                self._batched_insert_load(data, table_name)
+            elapsed = time.perf_counter() - start
+            rate = self._record_load(table_name, len(data), elapsed)
+            logger.info(f"Successfully loaded {len(data)} rows into {table_name} "
+                        f"in {elapsed:.2f}s ({rate:.0f} rows/s)")
         except Exception as e:
             logger.error(f"Error loading data into {table_name}: {str(e)}")
             raise
 
+    def _copy_load(self, data: pd.DataFrame, table_name: str):
+        # Creates the table from the frame's schema if it does not exist yet;
+        # COPY itself needs an existing table
+        data.head(0).to_sql(table_name, self.sql_engine, if_exists='append', index=False)
+
+        columns = ', '.join('"{}"'.format(str(col).replace('"', '""')) for col in data.columns)
+        copy_sql = 'COPY "{}" ({}) FROM STDIN WITH (FORMAT csv, NULL \'{}\')'.format(
+            table_name.replace('"', '""'), columns, self.COPY_NULL)
+        batch_size = self.config.get('load_batch_size', 100000)
+
+        conn = self.sql_engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            for start in range(0, len(data), batch_size):
+                buffer = io.StringIO()
+                self.copy_frame(data.iloc[start:start + batch_size]).to_csv(buffer, index=False, header=False,
+                                                                            na_rep=self.COPY_NULL)
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+            cursor.close()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def sql_frame(data: pd.DataFrame) -> pd.DataFrame:
+        # Timedeltas are stored as BIGINT nanoseconds by both load paths, with
+        # NaT as NULL rather than to_sql's int64 minimum sentinel
+        out = data.copy(deep=False)
+        for col in data.select_dtypes(include=['timedelta64[ns]']).columns:
+            values = data[col]
+            nanoseconds = values.to_numpy('timedelta64[ns]').view(np.int64)
+            out[col] = pd.Series(nanoseconds, index=data.index, dtype='Int64').mask(values.isna())
+        return out
+
+    @classmethod
+    def copy_frame(cls, data: pd.DataFrame) -> pd.DataFrame:
+        # Renders each column the way the table to_sql created expects it in
+        # COPY's CSV format: booleans as true/false. Missing values are written
+        # as COPY_NULL by _copy_load, since COPY would read an empty field as
+        # NULL and lose empty strings the INSERT path keeps
+        out = cls.sql_frame(data)
+        for col in data.columns:
+            if pd.api.types.is_bool_dtype(data[col]):
+                out[col] = data[col].map({True: 'true', False: 'false'})
+        return out
+
+    def _batched_insert_load(self, data: pd.DataFrame, table_name: str):
+        # Multi-row INSERTs, sized to stay under the driver's bind-parameter limit
+        max_params = 999 if self.sql_engine.dialect.name == 'sqlite' else self.config.get('load_max_params', 30000)
+        chunksize = max(1, min(self.config.get('load_batch_size', 100000), max_params // max(1, len(data.columns))))
+        data.to_sql(table_name, self.sql_engine, if_exists='append', index=False, method='multi', chunksize=chunksize)
+
+    def _record_load(self, table_name: str, rows: int, seconds: float) -> float:
+        with self._load_stats_lock:
+            stats = self.load_stats.setdefault(table_name, {'rows': 0, 'seconds': 0.0})
+            stats['rows'] += rows
+            stats['seconds'] += seconds
+            stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+        return rows / seconds if seconds else 0.0
+
+    def run_stage_graph(self, stages: Dict[str, Tuple[Callable[..., Any], List[str]]]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        # Each stage is submitted as soon as all of its dependencies have
+        # finished and receives their results as positional arguments
+        results = {}
+        timings = {}
+        remaining = dict(stages)
+
+        def timed(name, func, args):
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                timings[name] = time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=self.config.get('etl_max_workers', len(stages))) as executor:
+            running = {}
+            while remaining or running:
+                for name, (func, deps) in list(remaining.items()):
+                    if all(dep in results for dep in deps):
+                        args = [results[dep] for dep in deps]
+                        running[executor.submit(timed, name, func, args)] = name
+                        del remaining[name]
+                if not running:
+                    raise ValueError(f"Unresolvable ETL stage dependencies: {sorted(remaining)}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception:
+                        logger.error(f"ETL stage {name} failed after {timings.get(name, 0.0):.2f}s")
+                        for pending in running:
+                            pending.cancel()
+                        raise
+        return results, timings
+
     def run_etl_process(self):
+        stages = {
+            'extract_products': (lambda: self.extract_sql_data(
+                "SELECT * FROM products WHERE last_updated > (NOW() - INTERVAL 1 DAY)"), []),
+            'extract_certifications': (lambda: self.extract_mongo_data("certifications", {"status": "active"}), []),
+            'extract_kafka': (self.extract_kafka_data, []),
+            'transform_products': (self.transform_product_data, ['extract_products']),
+            'transform_certifications': (self.transform_certification_data, ['extract_certifications']),
+            'load_products': (lambda data: self.load_data(data, "analytics_products"), ['transform_products']),
+            'load_certifications': (lambda data: self.load_data(data, "analytics_certifications"),
+                                    ['transform_certifications']),
+            'process_kafka': (self.process_kafka_data, ['extract_kafka'])
+        }
+        if self.staging_store is not None:
+            # Columnar copies for the cleaner and models, which read Parquet instead of SQL.
+            # With de-duplication on, only the rows the load kept are staged.
+            dedup = bool(self.config.get('fingerprint_root'))
+            stages['stage_products'] = (lambda data: self.staging_store.write(data, 'products', 'last_updated'),
+                                        ['load_products' if dedup else 'transform_products'])
+            stages['stage_certifications'] = (lambda data: self.staging_store.write(
+                data, 'certifications', 'certification_date'),
+                ['load_certifications' if dedup else 'transform_certifications'])
+
         try:
-            # Extract data
-            product_data = self.extract_sql_data("SELECT * FROM products WHERE last_updated > (NOW() - INTERVAL 1 DAY)")
-            certification_data = self.extract_mongo_data("certifications", {"status": "active"})
-            kafka_data = self.extract_kafka_data()
-
-            # Transform data
-            transformed_product_data = self.transform_product_data(product_data)
-            transformed_certification_data = self.transform_certification_data(certification_data)
-
-            # Load data
-            with ThreadPoolExecutor(max_workers=3) as executor:
-                executor.submit(self.load_data, transformed_product_data, "analytics_products")
-                executor.submit(self.load_data, transformed_certification_data, "analytics_certifications")
-                executor.submit(self.process_kafka_data, kafka_data)
-
-            logger.info("ETL process completed successfully")
+            start = time.perf_counter()
+            _, timings = self.run_stage_graph(stages)
+            stage_times = ', '.join(f"{name}={seconds:.2f}s" for name, seconds in timings.items())
+            logger.info(f"ETL process completed successfully in {time.perf_counter() - start:.2f}s ({stage_times})")
         except Exception as e:
             logger.error(f"Error in ETL process: {str(e)}")
+            raise
+
+    def _load_and_stage(self, data: pd.DataFrame, table_name: str, dataset: str, date_column: str):
+        data = self.load_data(data, table_name)
+        if self.staging_store is not None and len(data):
+            self.staging_store.write(data, dataset, date_column)
+
+    def run_streaming_etl_process(self):
+        chunk_size = self.config.get('etl_chunk_size', 50000)
+        budget = MemoryBudget(self.config.get('etl_memory_budget_mb', 512) * 1024 * 1024)
+
+        product_chunks = self.complete_product_groups(self.stream_sql_data(
+            "SELECT * FROM products WHERE last_updated > (NOW() - INTERVAL 1 DAY) ORDER BY product_id",
+            chunk_size))
+        certification_chunks = self.stream_mongo_data("certifications", {"status": "active"}, chunk_size)
+
+        streams = {
+            'products': (product_chunks,
+                         lambda chunk: self._load_and_stage(self.transform_product_data(chunk),
+                                                            "analytics_products", 'products', 'last_updated')),
+            'certifications': (certification_chunks,
+                               lambda chunk: self._load_and_stage(self.transform_certification_data(chunk),
+                                                                  "analytics_certifications", 'certifications',
+                                                                  'certification_date'))
+        }
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(streams) + 1) as executor:
+                futures = {name: executor.submit(self._run_stream, name, chunks, process, budget)
+                           for name, (chunks, process) in streams.items()}
+                # Kafka batches are already bounded by kafka_max_records, and the
+                # consumer must poll, load and commit on a single thread
+                futures['kafka'] = executor.submit(self.consume_kafka_batches, stop_when_idle=True)
+                results = {name: future.result() for name, future in futures.items()}
+            logger.info(f"Streaming ETL process completed: {results}, "
+                        f"peak in-flight {budget.peak / (1024 * 1024):.1f} MB, "
+                        f"{budget.waits} backpressure waits")
+        except Exception as e:
+            logger.error(f"Error in streaming ETL process: {str(e)}")
+            raise
+
+    @staticmethod
+    def parse_kafka_messages(kafka_data: List[Any]) -> Tuple[List[Dict[str, Any]], int]:
+        # Each message is decoded on its own; one that is not a JSON object is
+        # skipped rather than failing, and endlessly replaying, its whole batch
+        events = []
+        for value in kafka_data:
+            try:
+                event = json.loads(value) if isinstance(value, (bytes, str)) else value
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Skipping malformed Kafka message: {str(e)}")
+                continue
+            if isinstance(event, dict):
+                events.append(event)
+            else:
+                logger.warning(f"Skipping Kafka message that is not an object: {type(event).__name__}")
+        return events, len(kafka_data) - len(events)
+
+    def _transform_kafka_events(self, events: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, int]:
+        # The batch is transformed as one frame; only if that fails is each
+        # event transformed alone, so the events that cannot be are skipped
+        try:
+            return self.transform_event_data(events), 0
+        except Exception as e:
+            logger.warning(f"Transforming {len(events)} Kafka events failed, retrying one by one: {str(e)}")
+        frames = []
+        for event in events:
+            try:
+                frames.append(self.transform_event_data([event]))
+            except Exception as e:
+                logger.warning(f"Skipping Kafka event that cannot be transformed: {str(e)}")
+        return (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()), len(events) - len(frames)
 
-    def process_kafka_data(self, kafka_data: List[Dict[str, Any]]):
-        # Process real-time data from Kafka
-        # Implement your logic here
-        pass
+    def process_kafka_data(self, kafka_data: List[Any]) -> int:
+        # Deserialise and transform the batch, load it, and only then commit the
+        # consumer's offsets. Bad messages are skipped (the count is returned);
+        # a load failure propagates so the batch is retried.
+        events, skipped = self.parse_kafka_messages(kafka_data)
+        transformed_event_data, failed = self._transform_kafka_events(events) if events else (pd.DataFrame(), 0)
+        if not transformed_event_data.empty:
+            self.load_data(transformed_event_data, self.config.get('kafka_events_table', 'analytics_iot_events'))
+        self.kafka_consumer.commit()
+        return skipped + failed
 
 if __name__ == "__main__":
     config = {
@@ -119,8 +649,24 @@ if __name__ == "__main__":
         'mongo_db_name': 'supplychain',
         'kafka_topic': 'supplychain_events',
         'kafka_bootstrap_servers': ['localhost:9092'],
-        'kafka_consumer_group': 'supplychain_analytics'
+        'kafka_consumer_group': 'supplychain_analytics',
+        'etl_streaming': False,
+        'etl_chunk_size': 50000,
+        'etl_memory_budget_mb': 512,
+        'kafka_max_records': 500,
+        'kafka_linger_ms': 1000,
+        'kafka_max_retries': 3,
+        'staging_root': 'staging',
+        'fingerprint_root': 'fingerprints',
+        'dedup_keys': {
+            'analytics_products': ['product_id', 'transfer_date', 'last_updated'],
+            'analytics_certifications': ['_id'],
+            'analytics_iot_events': ['device_id', 'timestamp']
+        }
     }
     
     etl = SupplyChainETL(config)
-    etl.run_etl_process()
+    if config.get('etl_streaming', False):
+        etl.run_streaming_etl_process()
+    else:
+        etl.run_etl_process()
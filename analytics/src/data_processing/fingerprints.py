@@ -0,0 +1,117 @@
+# analytics/src/data_processing/fingerprints.py
+
+import pandas as pd
+import numpy as np
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class FingerprintSet:
+    # Set of 64-bit row hashes kept as a few sorted runs (log-structured).
+    # Lookups are a binary search per run; new runs are merged into older ones
+    # once they grow to a comparable size, so inserts stay amortised O(log n).
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self.runs)
+
+    @staticmethod
+    def hash_rows(df: pd.DataFrame, columns: Optional[List[str]] = None) -> np.ndarray:
+        if columns is not None:
+            df = df[columns]
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            positions = np.searchsorted(run, hashes)
+            positions[positions == len(run)] = 0
+            found |= run[positions] == hashes
+        return found
+
+    def add(self, hashes: np.ndarray):
+        new = np.unique(np.asarray(hashes, dtype=np.uint64))
+        new = new[~self.contains(new)]
+        if len(new) == 0:
+            return
+        self.runs.append(new)
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            newest = self.runs.pop()
+            self.runs[-1] = np.union1d(self.runs[-1], newest)
+
+    def first_seen_mask(self, hashes: np.ndarray) -> np.ndarray:
+        # True for the first occurrence of each hash in this batch that has not
+        # been seen in an earlier batch; matches drop_duplicates(keep='first')
+        mask = np.zeros(len(hashes), dtype=bool)
+        _, first = np.unique(hashes, return_index=True)
+        mask[first] = True
+        mask &= ~self.contains(hashes)
+        return mask
+
+class FingerprintIndex(FingerprintSet):
+    # FingerprintSet persisted as one .npy file per sorted run plus a manifest.
+    # Runs are memory-mapped on open, so checking a batch costs a binary search
+    # per run without reading the whole index into RAM; at 8 bytes per row
+    # key, 100M rows take about 800 MB on disk.
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.lock = threading.Lock()
+        self._saved = []
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, self.MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self._open_runs(json.load(f)['runs'])
+        logger.info(f"Opened fingerprint index {directory} with {len(self)} keys in {len(self.runs)} runs")
+
+    def _open_runs(self, names: List[str]):
+        self._saved = [(np.load(os.path.join(self.directory, name), mmap_mode='r'), name) for name in names]
+        self.runs = [run for run, _ in self._saved]
+
+    def save(self):
+        # Runs untouched since the last save are the same objects and keep their
+        # files; new or merged runs are written out
+        saved_names = {id(run): name for run, name in self._saved}
+        names = []
+        for run in self.runs:
+            name = saved_names.get(id(run))
+            if name is None:
+                name = f"run-{uuid.uuid4().hex}.npy"
+                np.save(os.path.join(self.directory, name), np.asarray(run))
+            names.append(name)
+
+        # Swap the manifest atomically, then drop runs that were merged away
+        manifest_path = os.path.join(self.directory, self.MANIFEST)
+        with open(manifest_path + '.tmp', 'w') as f:
+            json.dump({'runs': names, 'keys': len(self)}, f)
+        os.replace(manifest_path + '.tmp', manifest_path)
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy') and name not in names:
+                os.remove(os.path.join(self.directory, name))
+        self._open_runs(names)
+
+    def filter_new(self, df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        # First occurrence of each key that was not recorded by an earlier
+        # commit(), so repeats within the batch are dropped too. Call commit()
+        # once the rows are stored.
+        hashes = self.hash_rows(df, columns)
+        keep = self.first_seen_mask(hashes)
+        dropped = len(df) - int(keep.sum())
+        if dropped:
+            logger.info(f"Dropped {dropped} previously seen or repeated rows using {self.directory}")
+        return df[keep]
+
+    def commit(self, df: pd.DataFrame, columns: Optional[List[str]] = None):
+        self.add(self.hash_rows(df, columns))
+        self.save()
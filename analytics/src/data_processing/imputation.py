@@ -0,0 +1,301 @@
+# analytics/src/data_processing/imputation.py
+
+import pandas as pd
+import numpy as np
+import joblib
+import logging
+from sklearn.impute import KNNImputer
+from typing import Dict, Any, List, Optional, Tuple
+from data_processing.sketches import QuantileSketch
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class ImputerStatistics:
+    # Pass-1 accumulator for fitting an imputer without holding the data:
+    # quantile sketches of each column's observed values, overall and per
+    # group, missing counts per group, and a bounded random sample of rows per
+    # group for strategies that search raw neighbours
+    def __init__(self, columns: List[str], group_column: Optional[str] = None, sample_size: int = 0,
+                 relative_accuracy: float = 0.01, random_state: int = 42):
+        self.columns = list(columns)
+        self.group_column = group_column
+        self.sample_size = sample_size
+        self.relative_accuracy = relative_accuracy
+        self.sketches = {col: QuantileSketch(relative_accuracy) for col in self.columns}
+        self.group_sketches = {}
+        self.missing = {col: pd.Series(dtype=np.int64) for col in self.columns}
+        self.sample = None
+        self._rng = np.random.default_rng(random_state)
+
+    def add(self, df: pd.DataFrame):
+        for col in self.columns:
+            self.sketches[col].add(df[col].to_numpy(dtype=np.float64))
+        groups = df[self.group_column] if self.group_column else pd.Series(None, index=df.index, dtype=object)
+        for col in self.columns:
+            missing = groups[df[col].isna()].value_counts(dropna=False)
+            self.missing[col] = self.missing[col].add(missing, fill_value=0).astype(np.int64)
+        if self.group_column:
+            for key, part in df.groupby(self.group_column, observed=True):
+                sketches = self.group_sketches.setdefault(
+                    key, {col: QuantileSketch(self.relative_accuracy) for col in self.columns})
+                for col in self.columns:
+                    sketches[col].add(part[col].to_numpy(dtype=np.float64))
+        if self.sample_size:
+            self._add_sample(df)
+
+    def _add_sample(self, df: pd.DataFrame):
+        # Keeps the rows with the smallest random priorities, which is a uniform
+        # sample of everything added so far, per group
+        columns = self.columns + ([self.group_column] if self.group_column else [])
+        rows = df[columns].assign(_priority=self._rng.random(len(df)))
+        sample = rows if self.sample is None else pd.concat([self.sample, rows], ignore_index=True)
+        sample = sample.sort_values('_priority', kind='mergesort')
+        if self.group_column:
+            self.sample = sample.groupby(self.group_column, observed=True).head(self.sample_size)
+        else:
+            self.sample = sample.head(self.sample_size)
+
+    def sample_rows(self) -> pd.DataFrame:
+        if self.sample is None:
+            return pd.DataFrame(columns=self.columns)
+        return self.sample.drop(columns='_priority').reset_index(drop=True)
+
+class BaseImputer:
+    def __init__(self):
+        self.columns = None
+        self.fallback_values = None
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.columns is not None
+
+    def fit(self, df: pd.DataFrame, columns: List[str]) -> 'BaseImputer':
+        self.columns = list(columns)
+        # Global medians fill whatever a strategy cannot resolve on its own
+        self.fallback_values = df[self.columns].median()
+        self._fit(df)
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not self.is_fitted:
+            raise ValueError("Imputer has not been fitted yet.")
+        df = self._transform(df)
+        return df.fillna(self.fallback_values.to_dict())
+
+    def fit_transform(self, df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        return self.fit(df, columns).transform(df)
+
+    def statistics(self, columns: List[str], relative_accuracy: float = 0.01) -> ImputerStatistics:
+        # The accumulator fit_statistics needs for this strategy
+        return ImputerStatistics(columns, relative_accuracy=relative_accuracy)
+
+    def fit_statistics(self, statistics: ImputerStatistics) -> 'BaseImputer':
+        # Out-of-core fit: medians come from the sketches instead of the frame
+        self.columns = list(statistics.columns)
+        self.fallback_values = pd.Series({col: statistics.sketches[col].quantile(0.5) for col in self.columns},
+                                         dtype=np.float64)
+        self._fit_statistics(statistics)
+        return self
+
+    def estimated_fills(self, statistics: ImputerStatistics, col: str) -> List[Tuple[float, int]]:
+        # (value, count) pairs approximating what transform writes into the
+        # gaps counted by statistics; exact for median strategies
+        return [(self.fallback_values[col], int(statistics.missing[col].sum()))]
+
+    def _fit(self, df: pd.DataFrame):
+        pass
+
+    def _fit_statistics(self, statistics: ImputerStatistics):
+        pass
+
+    def update(self, df: pd.DataFrame):
+        # Advances state carried between batches; only stateful strategies use it
+        pass
+
+    def _transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Strategies return a new frame and leave the caller's df unchanged
+        return df
+
+    def save(self, filepath: str):
+        joblib.dump(self, filepath)
+        logger.info(f"Imputer saved to {filepath}")
+
+    @staticmethod
+    def load(filepath: str) -> 'BaseImputer':
+        imputer = joblib.load(filepath)
+        logger.info(f"Imputer loaded from {filepath}")
+        return imputer
+
+class GroupedMedianImputer(BaseImputer):
+    def __init__(self, group_column: str = 'category'):
+        super().__init__()
+        self.group_column = group_column
+        self.group_medians = None
+
+    def _fit(self, df: pd.DataFrame):
+        self.group_medians = df.groupby(self.group_column, observed=True)[self.columns].median()
+
+    def statistics(self, columns: List[str], relative_accuracy: float = 0.01) -> ImputerStatistics:
+        return ImputerStatistics(columns, group_column=self.group_column, relative_accuracy=relative_accuracy)
+
+    def _fit_statistics(self, statistics: ImputerStatistics):
+        self.group_medians = pd.DataFrame.from_dict(
+            {key: {col: sketch.quantile(0.5) for col, sketch in sketches.items()}
+             for key, sketches in statistics.group_sketches.items()},
+            orient='index', columns=self.columns)
+
+    def estimated_fills(self, statistics: ImputerStatistics, col: str) -> List[Tuple[float, int]]:
+        medians = self.group_medians[col].reindex(statistics.missing[col].index).fillna(self.fallback_values[col])
+        return list(zip(medians.tolist(), statistics.missing[col].tolist()))
+
+    def _transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        # One hash join against the fitted per-group medians; O(n)
+        medians = self.group_medians.reindex(df[self.group_column].to_numpy())
+        df = df.copy()
+        for col in self.columns:
+            missing = df[col].isna().to_numpy()
+            if missing.any():
+                values = df[col].to_numpy(dtype=np.float64, copy=True)
+                values[missing] = medians[col].to_numpy()[missing]
+                df[col] = values
+        return df
+
+class ForwardFillImputer(BaseImputer):
+    def __init__(self, group_column: str = 'product_id', order_column: str = 'last_updated'):
+        super().__init__()
+        self.group_column = group_column
+        self.order_column = order_column
+        # Carry-over per series: last observed value of each column and when it was observed
+        self.last_values = None
+        self.last_seen = None
+
+    def _fit(self, df: pd.DataFrame):
+        self.last_values = self.last_seen = None
+        self.update(df)
+
+    def _fit_statistics(self, statistics: ImputerStatistics):
+        # No carry-over yet; update() builds it batch by batch
+        self.last_values = self.last_seen = None
+
+    def _last_observations(self, df: pd.DataFrame):
+        ordered = df.sort_values([self.group_column, self.order_column], kind='mergesort')
+        values, seen = {}, {}
+        for col in self.columns:
+            last = ordered[ordered[col].notna()].drop_duplicates(self.group_column, keep='last')
+            last = last.set_index(self.group_column)
+            values[col], seen[col] = last[col], last[self.order_column]
+        return pd.DataFrame(values, columns=self.columns), pd.DataFrame(seen, columns=self.columns)
+
+    def update(self, df: pd.DataFrame):
+        # Advances the carry-over with a batch after it has been transformed,
+        # so the next batch can continue each series; an older observation
+        # never replaces a newer one
+        values, seen = self._last_observations(df)
+        if self.last_values is None:
+            self.last_values, self.last_seen = values, seen
+            return
+        keys = self.last_values.index.union(values.index)
+        old_values, old_seen = self.last_values.reindex(keys), self.last_seen.reindex(keys)
+        values, seen = values.reindex(keys), seen.reindex(keys)
+        newer = values.notna() & ~(old_seen > seen)
+        self.last_values = values.where(newer, old_values)
+        self.last_seen = seen.where(newer, old_seen)
+
+    def _transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Stateless: the carry-over is only read, and df is not modified
+        order = np.lexsort((df[self.order_column].to_numpy(), df[self.group_column].to_numpy()))
+        ordered = df.iloc[order]
+        filled = ordered.groupby(self.group_column, observed=True)[self.columns].ffill()
+
+        # Leading gaps in a series take the carried value, but only one observed
+        # strictly before the gap, so a batch is never back-filled from its future
+        if self.last_values is not None and len(self.last_values):
+            groups = ordered[self.group_column].to_numpy()
+            carried = self.last_values.reindex(groups)
+            carried_seen = self.last_seen.reindex(groups)
+            row_order = ordered[self.order_column].to_numpy()
+            for col in self.columns:
+                values = filled[col].to_numpy(dtype=np.float64, copy=True)
+                gaps = np.isnan(values) & (carried_seen[col].to_numpy() < row_order)
+                if gaps.any():
+                    values[gaps] = carried[col].to_numpy(dtype=np.float64)[gaps]
+                    filled[col] = values
+
+        df = df.copy()
+        df[self.columns] = filled.reindex(df.index)
+        return df
+
+class SampledKNNImputer(BaseImputer):
+    def __init__(self, n_neighbors: int = 5, sample_size: int = 2000, chunk_size: int = 50000,
+                 partition_column: Optional[str] = None, random_state: int = 42):
+        super().__init__()
+        self.n_neighbors = n_neighbors
+        self.sample_size = sample_size
+        self.chunk_size = chunk_size
+        self.partition_column = partition_column
+        self.random_state = random_state
+        self.imputers = {}
+
+    def _fit_sample(self, df: pd.DataFrame) -> Tuple[List[str], Optional[KNNImputer]]:
+        # Neighbours are searched in a bounded reference sample, so transform is
+        # O(n * sample_size) instead of O(n^2) over the whole frame. Columns
+        # with no values in the sample are left to the fitted medians, since
+        # KNNImputer would drop them from its output.
+        sample = df[self.columns]
+        if len(sample) > self.sample_size:
+            sample = sample.sample(n=self.sample_size, random_state=self.random_state)
+        columns = [col for col in self.columns if sample[col].notna().any()]
+        if not columns:
+            return columns, None
+        return columns, KNNImputer(n_neighbors=self.n_neighbors).fit(sample[columns])
+
+    def _fit(self, df: pd.DataFrame):
+        if self.partition_column is None:
+            self.imputers = {None: self._fit_sample(df)}
+        else:
+            self.imputers = {key: self._fit_sample(part)
+                             for key, part in df.groupby(self.partition_column, observed=True)}
+
+    def statistics(self, columns: List[str], relative_accuracy: float = 0.01) -> ImputerStatistics:
+        return ImputerStatistics(columns, group_column=self.partition_column, sample_size=self.sample_size,
+                                 relative_accuracy=relative_accuracy, random_state=self.random_state)
+
+    def _fit_statistics(self, statistics: ImputerStatistics):
+        self._fit(statistics.sample_rows())
+
+    def _impute(self, imputer: Optional[KNNImputer], values: pd.DataFrame) -> np.ndarray:
+        # Only rows with gaps go through the neighbour search, in bounded chunks
+        result = values.to_numpy(dtype=np.float64, copy=True)
+        if imputer is None:
+            return result
+        rows = np.flatnonzero(np.isnan(result).any(axis=1))
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            result[chunk] = imputer.transform(values.iloc[chunk])
+        return result
+
+    def _transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        if self.partition_column is None:
+            columns, imputer = self.imputers[None]
+            df[columns] = self._impute(imputer, df[columns])
+            return df
+
+        for key, index in df.groupby(self.partition_column, observed=True).groups.items():
+            if key in self.imputers:
+                columns, imputer = self.imputers[key]
+                df.loc[index, columns] = self._impute(imputer, df.loc[index, columns])
+        return df
+
+IMPUTERS = {
+    'grouped_median': GroupedMedianImputer,
+    'forward_fill': ForwardFillImputer,
+    'sampled_knn': SampledKNNImputer
+}
+
+def make_imputer(strategy: str, params: Optional[Dict[str, Any]] = None) -> BaseImputer:
+    if strategy not in IMPUTERS:
+        raise ValueError(f"Unknown imputation strategy: {strategy}")
+    return IMPUTERS[strategy](**(params or {}))
@@ -0,0 +1,88 @@
+# analytics/src/data_processing/sketches.py
+
+import numpy as np
+import math
+from typing import Dict, Tuple
+
+class QuantileSketch:
+    # Mergeable relative-error quantile sketch (DDSketch-style log buckets).
+    # Each bucket also keeps the sum and sum of squares of its values, so the
+    # mean and variance of any value range can be read back without the data.
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero = np.zeros(3)
+        self.count = 0
+
+    def _add_to_store(self, store: Dict[int, np.ndarray], values: np.ndarray):
+        keys = np.ceil(np.log(np.abs(values)) / self.log_gamma).astype(np.int64)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        sums = np.bincount(inverse, weights=values)
+        squares = np.bincount(inverse, weights=values * values)
+        for key, count, total, square in zip(unique_keys.tolist(), counts, sums, squares):
+            bucket = store.get(key)
+            if bucket is None:
+                store[key] = np.array([count, total, square], dtype=np.float64)
+            else:
+                bucket += (count, total, square)
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        zeros = values == 0
+        self.zero += (zeros.sum(), 0.0, 0.0)
+        self._add_to_store(self.positive, values[values > 0])
+        self._add_to_store(self.negative, values[values < 0])
+
+    def merge(self, other: 'QuantileSketch'):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, bucket in other_store.items():
+                if key in store:
+                    store[key] += bucket
+                else:
+                    store[key] = bucket.copy()
+        self.zero += other.zero
+        self.count += other.count
+
+    def _buckets(self):
+        # (representative value, [count, sum, sum_sq]) in ascending value order
+        for key in sorted(self.negative, reverse=True):
+            yield -2 * self.gamma ** key / (self.gamma + 1), self.negative[key]
+        if self.zero[0]:
+            yield 0.0, self.zero
+        for key in sorted(self.positive):
+            yield 2 * self.gamma ** key / (self.gamma + 1), self.positive[key]
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float('nan')
+        rank = q * (self.count - 1)
+        seen = 0
+        for value, bucket in self._buckets():
+            seen += bucket[0]
+            if seen > rank:
+                return value
+        return value
+
+    def moments(self, lower: float = -np.inf, upper: float = np.inf) -> Tuple[float, float, float]:
+        # Count, mean and population standard deviation of buckets inside [lower, upper]
+        count = total = square = 0.0
+        for value, bucket in self._buckets():
+            if lower <= value <= upper:
+                count += bucket[0]
+                total += bucket[1]
+                square += bucket[2]
+        if count == 0:
+            return 0.0, float('nan'), float('nan')
+        mean = total / count
+        variance = max(square / count - mean * mean, 0.0)
+        return count, mean, math.sqrt(variance)
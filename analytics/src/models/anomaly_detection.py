@@ -8,7 +8,17 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import confusion_matrix, classification_report
 import joblib
 import logging
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Tuple
+import os
+import sys
+
+# Run as a script: make the analytics/src packages importable
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_processing.staging import StagingStore  # noqa: E402
+from models.features import FeatureCache, FeaturePipeline  # noqa: E402
+from models.artifacts import (FlatForest, FlatIsolationForest, check_artifact, is_artifact, load_artifact,  # noqa: E402
+                              save_artifact, scaler_arrays, scaler_from_arrays)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,27 +29,67 @@ class SupplyChainAnomalyDetection:
         self.config = config
         self.model = None
         self.scaler = StandardScaler()
+        self.feature_names = config.get('feature_names')
+        self.model_metadata = None
+        self._flat_forest = None
+        self.contamination = config.get('contamination', 0.1)
+        # Bounded, recency-biased sample of the prepared rows seen so far; the
+        # base for drift checks and full refits in update_model
+        self.reservoir = None
+        self._rng = np.random.default_rng(config.get('random_state', 42))
+        # feature_columns/categorical_columns let the same detector run on other
+        # feature sets, such as the IoT window features of the streaming scorer
+        self.features = FeaturePipeline(config.get('feature_columns', self.FEATURES),
+                                        config.get('categorical_columns'))
+        self.feature_cache = FeatureCache(config['feature_cache_dir']) if config.get('feature_cache_dir') else None
 
-    def prepare_data(self, df: pd.DataFrame) -> np.ndarray:
-        # Select features for anomaly detection
-        features = ['price', 'quantity', 'avg_transfer_time', 'age_days']
-        X = df[features]
+    MODEL_TYPE = 'isolation_forest'
+    FEATURES = ['price', 'quantity', 'avg_transfer_time', 'age_days']
 
-        # Encode categorical variables if any
-        X = pd.get_dummies(X, columns=['category'], drop_first=True)
+    def load_staged_data(self, store: StagingStore, dataset: str = 'cleaned_products',
+                         filters: list = None) -> pd.DataFrame:
+        # Only the columns prepare_data uses are read from the staging store
+        return store.read(dataset, columns=self.features.columns, filters=filters)
 
-        # Scale the features
-        X_scaled = self.scaler.fit_transform(X)
+    def encode_data(self, df: pd.DataFrame) -> np.ndarray:
+        # Unscaled float32 features; the vocabulary is fitted on the first call only
+        if not self.features.is_fitted:
+            self.features.fit(df)
+        self.feature_names = self.features.feature_names
+        return self.features.transform(df)
 
-        return X_scaled
+    def scale_data(self, X: np.ndarray, copy: bool = False) -> np.ndarray:
+        # The scaler is fitted once, on the training data, and reused afterwards
+        if not hasattr(self.scaler, 'mean_'):
+            self.scaler.fit(X)
+        return self.scaler.transform(X, copy=copy)
+
+    def prepare_data(self, df: pd.DataFrame) -> np.ndarray:
+        return self.scale_data(self.encode_data(df))
+
+    def load_features(self, store: StagingStore, dataset: str = 'cleaned_products',
+                      filters: list = None) -> np.ndarray:
+        # Encoded data is reused across runs until the staged files change
+        def compute():
+            return {'X': self.encode_data(self.load_staged_data(store, dataset, filters))}
+
+        if self.feature_cache is None:
+            return self.scale_data(compute()['X'])
+        arrays, self.features = self.feature_cache.fetch(store.version(dataset, filters), self.features, compute)
+        self.feature_names = self.features.feature_names
+        # Cached arrays are read-only memory maps, so scaling works on a copy
+        return self.scale_data(arrays['X'], copy=True)
 
     def train_model(self, X: np.ndarray, contamination: float = 0.1):
         # Split the data
         X_train, X_test = train_test_split(X, test_size=0.2, random_state=42)
 
         # Train the Isolation Forest model
-        self.model = IsolationForest(contamination=contamination, random_state=42, n_jobs=-1)
-        self.model.fit(X_train)
+        self.model = self._fit_forest(X_train, contamination)
+        self.contamination = contamination
+        self._flat_forest = None
+        self.reservoir = None
+        self._add_to_reservoir(X[self._rng.permutation(len(X))])
 
         # Evaluate the model
         y_pred_train = self.model.predict(X_train)
@@ -47,7 +97,7 @@ class SupplyChainAnomalyDetection:
 
         # Convert predictions to binary (1 for inliers, 0 for outliers)
         y_pred_train = np.where(y_pred_train == 1, 1, 0)
-                y_pred_test = np.where(y_pred_test == 1, 1, 0)
+        y_pred_test = np.where(y_pred_test == 1, 1, 0)
 
         # Calculate the anomaly ratio
         anomaly_ratio = np.mean(y_pred_test == 0)
@@ -55,6 +105,88 @@ class SupplyChainAnomalyDetection:
 
         logger.info("Model trained successfully")
 
+    def _fit_forest(self, X: np.ndarray, contamination: float) -> IsolationForest:
+        model = IsolationForest(n_estimators=self.config.get('n_estimators', 100), contamination=contamination,
+                                random_state=42, n_jobs=-1)
+        return model.fit(X)
+
+    def _add_to_reservoir(self, X: np.ndarray):
+        # Rows fill the reservoir until it is full; after that every new row
+        # overwrites a random slot, so the sample decays exponentially towards
+        # recent rows (mean age about reservoir_size rows)
+        size = self.config.get('reservoir_size', 50000)
+        if self.reservoir is None:
+            self.reservoir = np.empty((0, X.shape[1]))
+        elif not self.reservoir.flags.writeable:
+            # Memory-mapped from a loaded artifact
+            self.reservoir = np.array(self.reservoir)
+        free = max(0, size - len(self.reservoir))
+        if free:
+            self.reservoir = np.concatenate([self.reservoir, X[:free]])
+            X = X[free:]
+        if len(X):
+            slots = self._rng.integers(0, size, len(X))
+            # Where several rows draw the same slot the latest one wins
+            slots, last = np.unique(slots[::-1], return_index=True)
+            self.reservoir[slots] = X[len(X) - 1 - last]
+
+    def _replace_oldest_trees(self, X_new: np.ndarray, n_trees: int):
+        model = self.model
+        if len(X_new) < model.max_samples_:
+            # Too few new rows for a full subsample; top up from the reservoir
+            extra = self._rng.choice(len(self.reservoir), model.max_samples_ - len(X_new), replace=False)
+            X_new = np.concatenate([X_new, self.reservoir[extra]])
+
+        # warm_start only fits the added trees; a fresh seed keeps them from
+        # repeating the subsamples of the trees they replace
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_trees,
+                         max_samples=model.max_samples_, random_state=int(self._rng.integers(2 ** 31 - 1)))
+        seeds = np.asarray(model._seeds)
+        model.fit(X_new)
+        # A warm-started fit leaves only the added trees' seeds in _seeds, from
+        # which estimators_samples_ is regenerated; rejoin the kept trees' seeds
+        model._seeds = np.concatenate([seeds, np.asarray(model._seeds)[-n_trees:]])
+        # Every per-tree attribute is trimmed alike
+        for name in ('estimators_', 'estimators_features_', '_seeds', '_average_path_length_per_tree',
+                     '_decision_path_lengths'):
+            if hasattr(model, name):
+                setattr(model, name, getattr(model, name)[n_trees:])
+        model.set_params(warm_start=False, n_estimators=len(model.estimators_))
+
+        # fit() set the threshold from the new rows alone
+        model.offset_ = np.percentile(model.score_samples(self.reservoir), 100.0 * self.contamination)
+
+    def update_model(self, X_new: np.ndarray) -> Dict[str, Any]:
+        # Refreshes the model with newly prepared rows. The oldest trees are
+        # replaced by trees fitted on the new rows only, so the cost follows the
+        # new data volume rather than the history. If the new rows are flagged
+        # far more often than the contamination rate, the data has drifted and
+        # the forest is refitted on the reservoir instead.
+        if self.model is None:
+            raise ValueError("Model has not been trained yet.")
+        flag_rate = float(np.mean(self.model.predict(X_new) == -1))
+        self._add_to_reservoir(X_new)
+
+        drifted = (len(X_new) >= self.config.get('drift_min_rows', 100) and
+                   flag_rate > self.config.get('drift_flag_ratio', 3.0) * self.contamination)
+        n_trees = 0
+        if drifted or isinstance(self.model, FlatIsolationForest):
+            # Loaded artifacts hold no sklearn trees to warm-start from
+            self.model = self._fit_forest(self.reservoir, self.contamination)
+            mode = 'full'
+        else:
+            n_trees = max(1, int(round(len(self.model.estimators_) *
+                                       self.config.get('incremental_replace_fraction', 0.1))))
+            self._replace_oldest_trees(X_new, n_trees)
+            mode = 'incremental'
+        self._flat_forest = None
+
+        logger.info(f"{mode.capitalize()} model update on {len(X_new)} rows: flag rate {flag_rate:.2%}"
+                    f"{' (drift detected)' if drifted else ''}, {n_trees} trees replaced, "
+                    f"reservoir {len(self.reservoir)} rows")
+        return {'mode': mode, 'rows': len(X_new), 'flag_rate': flag_rate, 'drifted': drifted,
+                'trees_replaced': n_trees}
+
     def detect_anomalies(self, X: np.ndarray) -> np.ndarray:
         if self.model is None:
             raise ValueError("Model has not been trained yet.")
@@ -68,14 +200,67 @@ class SupplyChainAnomalyDetection:
         # Convert predictions to binary (1 for inliers, 0 for outliers)
         return np.where(predictions == 1, 1, 0)
 
+    def score_anomalies(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Same labels as detect_anomalies plus an anomaly score (higher is more
+        # anomalous; positive scores are the flagged rows)
+        if self.model is None:
+            raise ValueError("Model has not been trained yet.")
+        scores = -self.model.decision_function(self.scaler.transform(X))
+        return np.where(scores > 0, 0, 1), scores
+
     def save_model(self, filepath: str):
         if self.model is None:
             raise ValueError("Model has not been trained yet.")
-        joblib.dump((self.model, self.scaler), filepath)
+        if self.config.get('model_format', 'artifact') == 'artifact':
+            self.model_metadata = self._save_artifact(filepath)
+        else:
+            joblib.dump((self.model, self.scaler), filepath)
         logger.info(f"Model and scaler saved to {filepath}")
 
+    def flat_forest(self) -> FlatForest:
+        # Flattened once per model version and reused until the model changes
+        version = (self.model_metadata or {}).get('model_version') or id(self.model)
+        if self._flat_forest is None or self._flat_forest[0] != version:
+            if isinstance(self.model, FlatIsolationForest):
+                forest = self.model.forest
+            else:
+                # Trees fitted on a feature subset index into that subset
+                subsampled = any(len(features) != self.model.n_features_in_
+                                 for features in self.model.estimators_features_)
+                forest = FlatForest.from_estimators(self.model.estimators_,
+                                                    self.model.estimators_features_ if subsampled else None)
+            self._flat_forest = (version, forest)
+        return self._flat_forest[1]
+
+    def _save_artifact(self, filepath: str) -> Dict[str, Any]:
+        forest = self.flat_forest()
+        arrays = {**scaler_arrays(self.scaler), **forest.to_arrays()}
+        if self.reservoir is not None:
+            arrays['reservoir'] = self.reservoir
+        feature_names = self.feature_names or [f"feature_{i}" for i in range(self.scaler.n_features_in_)]
+        params = {'max_depth': forest.max_depth, 'max_samples': int(self.model.max_samples_),
+                  'offset': float(self.model.offset_), 'contamination': self.contamination}
+        features = self.features.to_metadata() if self.features.is_fitted else None
+        return save_artifact(filepath, self.MODEL_TYPE, feature_names, arrays, params, features)
+
     def load_model(self, filepath: str):
-        self.model, self.scaler = joblib.load(filepath)
+        # Artifacts are memory-mapped, so worker processes share one copy of the forest
+        loaded = load_artifact(filepath, mmap=self.config.get('model_mmap', True))
+        if is_artifact(loaded):
+            metadata = check_artifact(loaded, self.MODEL_TYPE, self.features, self.feature_names)
+            arrays = loaded['arrays']
+            params = metadata['params']
+            self.model = FlatIsolationForest(FlatForest(arrays, params['max_depth']), params['max_samples'],
+                                             params['offset'], metadata['schema']['n_features'])
+            self.scaler = scaler_from_arrays(arrays)
+            self.feature_names = metadata['feature_names']
+            self.model_metadata = metadata
+            self.contamination = params.get('contamination', self.contamination)
+            self.reservoir = arrays.get('reservoir')
+            if metadata['features'] is not None:
+                self.features = FeaturePipeline.from_metadata(metadata['features'])
+        else:
+            self.model, self.scaler = loaded
         logger.info(f"Model and scaler loaded from {filepath}")
 
     def evaluate_model(self, X: np.ndarray, y_true: np.ndarray) -> Dict[str, Any]:
@@ -93,42 +278,55 @@ class SupplyChainAnomalyDetection:
             "classification_report": cr
         }
 
-    def explain_anomalies(self, X: np.ndarray, feature_names: List[str]) -> pd.DataFrame:
+    def feature_attributions(self, X_scaled: np.ndarray) -> np.ndarray:
+        # Per-row share of the isolation owed to each feature (rows sum to 1),
+        # from the split features along each row's path through every tree
         if self.model is None:
             raise ValueError("Model has not been trained yet.")
-        
-        # Get anomaly scores
-        anomaly_scores = -self.model.score_samples(X)
-        
-        # Create a DataFrame with feature names and their corresponding anomaly scores
-        anomaly_contribution = pd.DataFrame(X, columns=feature_names)
-        anomaly_contribution['anomaly_score'] = anomaly_scores
-        
-        # Calculate the correlation between features and anomaly scores
-        correlations = anomaly_contribution.corr()['anomaly_score'].sort_values(ascending=False)
-        
-        return correlations
+        return self.flat_forest().path_attributions(X_scaled, self.scaler.n_features_in_)
+
+    def explain_anomalies(self, X: np.ndarray, feature_names: List[str] = None) -> pd.DataFrame:
+        # Why each flagged row was flagged; inliers are not attributed at all.
+        # Indexed by row position in X, one column per feature.
+        labels, scores = self.score_anomalies(X)
+        flagged = np.flatnonzero(labels == 0)
+        feature_names = feature_names or self.feature_names or \
+            [f"feature_{i}" for i in range(self.scaler.n_features_in_)]
+
+        attributions = self.feature_attributions(self.scaler.transform(X[flagged])) if len(flagged) \
+            else np.zeros((0, len(feature_names)))
+        explanations = pd.DataFrame(attributions, columns=feature_names, index=flagged)
+        explanations['top_feature'] = np.asarray(feature_names)[attributions.argmax(axis=1)]
+        explanations['anomaly_score'] = scores[flagged]
+        return explanations
 
 if __name__ == "__main__":
     # Example usage
     config = {
         'contamination': 0.1,
-        'random_state': 42
+        'random_state': 42,
+        'staging_root': 'staging',
+        'feature_cache_dir': 'feature_cache'
     }
     anomaly_detector = SupplyChainAnomalyDetection(config)
 
-    # Load and prepare your data
-    df = pd.read_csv('your_cleaned_data.csv')
-    X = anomaly_detector.prepare_data(df)
+    # Load and prepare your data (featurised once per staged dataset version)
+    X = anomaly_detector.load_features(StagingStore(config))
 
     # Train the model
     anomaly_detector.train_model(X)
 
     # Detect anomalies in new data
-    new_data = np.array([[100, 50.0, 1000, 5]])  # Example new data point
+    new_data = anomaly_detector.encode_data(pd.DataFrame([{  # Example new data point
+        'price': 100, 'quantity': 50.0, 'avg_transfer_time': 1000, 'age_days': 5, 'category': 'Electronics'}]))
     anomalies = anomaly_detector.detect_anomalies(new_data)
     logger.info(f"Anomaly detection result: {anomalies}")
 
+    # Hourly refresh with the rows staged since the last run
+    update = anomaly_detector.update_model(
+        anomaly_detector.load_features(StagingStore(config), filters=[('date', '=', '2024-01-02')]))
+    logger.info(f"Model update: {update}")
+
     # Save the model
     anomaly_detector.save_model('supply_chain_anomaly_model.joblib')
 
@@ -139,8 +337,7 @@ if __name__ == "__main__":
     logger.info(f"Confusion Matrix:\n{evaluation_results['confusion_matrix']}")
     logger.info(f"Classification Report:\n{evaluation_results['classification_report']}")
 
-    # Explain anomalies
-    feature_names = ['price', 'quantity', 'avg_transfer_time', 'age_days']
-    anomaly_explanations = anomaly_detector.explain_anomalies(X, feature_names)
-    logger.info("Anomaly Explanations (Feature Correlations with Anomaly Scores):")
+    # Explain anomalies (only flagged rows are returned)
+    anomaly_explanations = anomaly_detector.explain_anomalies(new_data)
+    logger.info("Anomaly Explanations (Share of Isolation per Feature):")
     logger.info(anomaly_explanations)
@@ -0,0 +1,277 @@
+# analytics/src/models/artifacts.py
+
+import numpy as np
+import joblib
+import logging
+import sklearn
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
+from sklearn.base import BaseEstimator
+from sklearn.preprocessing import StandardScaler
+from models.features import FeaturePipeline
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 'supply-chain-model-artifact'
+ARTIFACT_VERSION = 1
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    # Expected path length of an unsuccessful BST search over n samples, as used
+    # by IsolationForest to correct the depth of leaves holding several samples
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n_samples)
+    result[n_samples == 2] = 1.0
+    large = n_samples > 2
+    n = n_samples[large]
+    result[large] = 2.0 * (np.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+    return result
+
+class FlatForest:
+    # All trees of a fitted sklearn forest packed into a few flat arrays with
+    # global node ids. Plain arrays can be memory-mapped read-only and shared by
+    # every worker process, which sklearn's own Tree objects cannot: they copy
+    # their nodes into private buffers when unpickled.
+    ARRAYS = ('roots', 'left', 'right', 'feature', 'threshold', 'value', 'n_node_samples')
+
+    def __init__(self, arrays: Dict[str, np.ndarray], max_depth: int):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.max_depth = max_depth
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_estimators(cls, estimators: list, features: Optional[List[np.ndarray]] = None) -> 'FlatForest':
+        # features[i] maps tree i's column indices back to the input columns when
+        # the tree was fitted on a subset of them
+        roots, left, right, feature, threshold, value, samples = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for i, estimator in enumerate(estimators):
+            tree = estimator.tree_
+            is_leaf = tree.children_left < 0
+            roots.append(offset)
+            left.append(np.where(is_leaf, -1, tree.children_left + offset))
+            right.append(np.where(is_leaf, -1, tree.children_right + offset))
+            tree_feature = np.where(is_leaf, 0, tree.feature)
+            if features is not None:
+                tree_feature = np.asarray(features[i])[tree_feature]
+            feature.append(tree_feature)
+            threshold.append(tree.threshold)
+            value.append(tree.value[:, 0, 0])
+            samples.append(tree.n_node_samples)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        arrays = {
+            'roots': np.array(roots, dtype=np.int64),
+            'left': np.concatenate(left).astype(np.int64),
+            'right': np.concatenate(right).astype(np.int64),
+            'feature': np.concatenate(feature).astype(np.int64),
+            'threshold': np.concatenate(threshold).astype(np.float64),
+            'value': np.concatenate(value).astype(np.float64),
+            'n_node_samples': np.concatenate(samples).astype(np.int64)
+        }
+        return cls(arrays, max_depth)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: np.asarray(getattr(self, name)) for name in self.ARRAYS}
+
+    def apply(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Leaf id and depth for every (row, tree). All trees are walked together
+        # one level at a time, dropping (row, tree) pairs as they reach a leaf.
+        # Rows are compared as float32, exactly like sklearn's trees.
+        X = np.asarray(X, dtype=np.float32)
+        n_rows, n_trees = len(X), self.n_trees
+        nodes = np.tile(self.roots, n_rows)
+        rows = np.repeat(np.arange(n_rows), n_trees)
+        depths = np.zeros(n_rows * n_trees, dtype=np.int32)
+        active = np.arange(n_rows * n_trees)
+        while len(active):
+            current = nodes[active]
+            left = self.left[current]
+            inner = left >= 0
+            active, current, left = active[inner], current[inner], left[inner]
+            go_left = X[rows[active], self.feature[current]] <= self.threshold[current]
+            nodes[active] = np.where(go_left, left, self.right[current])
+            depths[active] += 1
+        return nodes.reshape(n_rows, n_trees), depths.reshape(n_rows, n_trees)
+
+    def _chunks(self, X: np.ndarray, chunk_cells: int = 1 << 22):
+        # Bounds the (rows x trees) working arrays to a few tens of MB
+        step = max(1, chunk_cells // max(1, self.n_trees))
+        for start in range(0, len(X), step):
+            yield X[start:start + step]
+
+    def predict_mean(self, X: np.ndarray) -> np.ndarray:
+        return np.concatenate([self.value[self.apply(chunk)[0]].mean(axis=1) for chunk in self._chunks(X)])
+
+    def path_lengths(self, X: np.ndarray) -> np.ndarray:
+        # Isolation depth per (row, tree), corrected for the samples left in the leaf
+        lengths = []
+        for chunk in self._chunks(X):
+            leaves, depths = self.apply(chunk)
+            lengths.append(depths + average_path_length(self.n_node_samples[leaves]))
+        return np.concatenate(lengths)
+
+    def parents(self) -> np.ndarray:
+        # Parent node id of every node (-1 for roots), built on first use
+        if getattr(self, '_parents', None) is None:
+            parents = np.full(len(self.left), -1, dtype=np.int64)
+            inner = np.flatnonzero(self.left >= 0)
+            parents[self.left[inner]] = inner
+            parents[self.right[inner]] = inner
+            self._parents = parents
+        return self._parents
+
+    def path_attributions(self, X: np.ndarray, n_features: int) -> np.ndarray:
+        # Share of each row's isolation owed to each input column. In every tree
+        # the split that finally cuts the row off (its leaf's parent) credits its
+        # feature with 1 / path length, so trees that isolate the row early
+        # weigh most. Rows sum to 1.
+        parents = self.parents()
+        attributions = []
+        for chunk in self._chunks(X):
+            leaves, depths = self.apply(chunk)
+            weights = 1.0 / np.maximum(depths + average_path_length(self.n_node_samples[leaves]), 1.0)
+            splits = parents[leaves]
+            rows = np.broadcast_to(np.arange(len(chunk))[:, None], leaves.shape)
+            has_split = splits >= 0
+            totals = np.bincount(rows[has_split] * n_features + self.feature[splits[has_split]],
+                                 weights=weights[has_split], minlength=len(chunk) * n_features)
+            totals = totals.reshape(len(chunk), n_features)
+            with np.errstate(invalid='ignore'):
+                attributions.append(np.nan_to_num(totals / totals.sum(axis=1, keepdims=True)))
+        return np.concatenate(attributions) if attributions else np.zeros((0, n_features))
+
+class FlatForestRegressor(BaseEstimator):
+    # Read-only stand-in for a fitted RandomForestRegressor; usable as a Pipeline step
+    def __init__(self, forest: FlatForest, feature_importances: np.ndarray, n_features: int):
+        self.forest = forest
+        self.feature_importances = feature_importances
+        self.n_features = n_features
+        self.feature_importances_ = feature_importances
+        self.n_features_in_ = n_features
+
+    def fit(self, X: np.ndarray, y: np.ndarray):
+        raise ValueError("Artifact models are read-only; retrain with train_model.")
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.forest.predict_mean(X)
+
+class FlatIsolationForest(BaseEstimator):
+    # Read-only stand-in for a fitted IsolationForest
+    def __init__(self, forest: FlatForest, max_samples: int, offset: float, n_features: int):
+        self.forest = forest
+        self.max_samples = max_samples
+        self.offset = offset
+        self.n_features = n_features
+        self.max_samples_ = max_samples
+        self.offset_ = offset
+        self.n_features_in_ = n_features
+
+    def fit(self, X: np.ndarray):
+        raise ValueError("Artifact models are read-only; retrain with train_model.")
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        depths = self.forest.path_lengths(X).mean(axis=1)
+        return -2.0 ** (-depths / average_path_length([self.max_samples_])[0])
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+def scaler_arrays(scaler: StandardScaler) -> Dict[str, np.ndarray]:
+    return {'scaler_mean': scaler.mean_, 'scaler_scale': scaler.scale_, 'scaler_var': scaler.var_}
+
+def scaler_from_arrays(arrays: Dict[str, np.ndarray]) -> StandardScaler:
+    scaler = StandardScaler()
+    scaler.mean_ = arrays['scaler_mean']
+    scaler.scale_ = arrays['scaler_scale']
+    scaler.var_ = arrays['scaler_var']
+    scaler.n_features_in_ = len(scaler.mean_)
+    scaler.n_samples_seen_ = 0
+    return scaler
+
+def save_artifact(filepath: str, model_type: str, feature_names: List[str],
+                  arrays: Dict[str, np.ndarray], params: Dict[str, Any],
+                  features: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # Uncompressed joblib file of plain arrays plus metadata, so that
+    # load_artifact can memory-map every array instead of reading it
+    metadata = {
+        'format': ARTIFACT_FORMAT,
+        'artifact_version': ARTIFACT_VERSION,
+        'model_type': model_type,
+        'model_version': uuid.uuid4().hex,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'sklearn_version': sklearn.__version__,
+        'feature_names': list(feature_names),
+        'schema': {'n_features': len(feature_names), 'dtype': 'float32'},
+        'features': features,
+        'params': params
+    }
+    joblib.dump({'metadata': metadata, 'arrays': {name: np.ascontiguousarray(a) for name, a in arrays.items()}},
+                filepath, compress=0)
+    logger.info(f"Saved {model_type} artifact {metadata['model_version']} to {filepath}")
+    return metadata
+
+def is_artifact(obj: Any) -> bool:
+    return isinstance(obj, dict) and obj.get('metadata', {}).get('format') == ARTIFACT_FORMAT
+
+def expected_feature_names(features: FeaturePipeline, metadata: Dict[str, Any]) -> Optional[List[str]]:
+    # Columns the loading model's pipeline produces. An unfitted pipeline takes
+    # the artifact's vocabulary, so only its own column lists are compared.
+    if features.is_fitted:
+        return features.feature_names
+    stored = metadata['features']
+    if stored is None:
+        return None
+    missing = [col for col in features.categorical_columns if col not in stored['vocabulary']]
+    if missing:
+        raise ValueError(f"Artifact has no vocabulary for categorical columns {missing}")
+    pipeline = FeaturePipeline(features.numeric_columns, features.categorical_columns)
+    pipeline.vocabulary = {col: stored['vocabulary'][col] for col in features.categorical_columns}
+    return pipeline.feature_names
+
+def check_artifact(obj: Dict[str, Any], model_type: str, features: FeaturePipeline,
+                   feature_names: Optional[List[str]] = None) -> Dict[str, Any]:
+    metadata = obj['metadata']
+    if metadata['artifact_version'] > ARTIFACT_VERSION:
+        raise ValueError(f"Artifact version {metadata['artifact_version']} is newer than "
+                         f"supported version {ARTIFACT_VERSION}")
+    if metadata['model_type'] != model_type:
+        raise ValueError(f"Expected a {model_type} artifact, got {metadata['model_type']}")
+    if len(metadata['feature_names']) != metadata['schema']['n_features'] or \
+            len(obj['arrays']['scaler_mean']) != metadata['schema']['n_features']:
+        raise ValueError("Artifact schema does not match its stored arrays")
+    if feature_names is not None and list(feature_names) != metadata['feature_names']:
+        raise ValueError(f"Artifact features {metadata['feature_names']} do not match "
+                         f"expected features {list(feature_names)}")
+
+    expected = expected_feature_names(features, metadata)
+    if expected is None:
+        # Artifacts saved without pipeline metadata: numeric columns come first,
+        # then one-hot columns named after a categorical column
+        n_numeric = len(features.numeric_columns)
+        stored = metadata['feature_names']
+        if stored[:n_numeric] != features.numeric_columns or not all(
+                any(name.startswith(f"{col}_") for col in features.categorical_columns)
+                for name in stored[n_numeric:]):
+            raise ValueError(f"Artifact features {stored} do not match the model's feature columns "
+                             f"{features.columns}")
+    elif expected != metadata['feature_names']:
+        raise ValueError(f"Artifact features {metadata['feature_names']} do not match "
+                         f"the model's feature pipeline output {expected}")
+    return metadata
+
+def load_artifact(filepath: str, mmap: bool = True) -> Any:
+    # Returns whatever the file holds; callers check is_artifact() to tell the
+    # array format apart from a legacy pickled estimator
+    return joblib.load(filepath, mmap_mode='r' if mmap else None)
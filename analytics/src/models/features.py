@@ -0,0 +1,129 @@
+# analytics/src/models/features.py
+
+import pandas as pd
+import numpy as np
+import hashlib
+import joblib
+import logging
+import os
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class FeaturePipeline:
+    # Numeric columns followed by one-hot columns for each categorical column.
+    # The category vocabulary is fitted once and reused for every later batch,
+    # so scoring always produces the same columns as training. As with
+    # get_dummies(drop_first=True), the first category of each column has no
+    # indicator; categories unseen at fit time encode as all zeros.
+    def __init__(self, numeric_columns: List[str], categorical_columns: Optional[List[str]] = None):
+        self.numeric_columns = list(numeric_columns)
+        self.categorical_columns = list(categorical_columns if categorical_columns is not None else ['category'])
+        self.vocabulary = None
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.vocabulary is not None
+
+    @property
+    def columns(self) -> List[str]:
+        # Input columns a frame needs for transform()
+        return self.numeric_columns + self.categorical_columns
+
+    @property
+    def feature_names(self) -> List[str]:
+        if not self.is_fitted:
+            raise ValueError("Feature pipeline has not been fitted yet.")
+        names = list(self.numeric_columns)
+        for col in self.categorical_columns:
+            names += [f"{col}_{value}" for value in self.vocabulary[col][1:]]
+        return names
+
+    @property
+    def version(self) -> str:
+        # Changes whenever the produced columns would change
+        return hashlib.sha1(repr((self.columns, self.vocabulary)).encode()).hexdigest()[:16]
+
+    def fit(self, df: pd.DataFrame) -> 'FeaturePipeline':
+        self.vocabulary = {col: sorted(str(value) for value in df[col].dropna().unique())
+                           for col in self.categorical_columns}
+        logger.info(f"Fitted feature pipeline with {len(self.feature_names)} features")
+        return self
+
+    def transform(self, df: pd.DataFrame, out: Optional[np.ndarray] = None) -> np.ndarray:
+        # Writes straight into one float32 matrix (optionally caller-provided)
+        # instead of building an intermediate dummies frame
+        names = self.feature_names
+        if out is None:
+            out = np.empty((len(df), len(names)), dtype=np.float32)
+        elif out.shape != (len(df), len(names)) or out.dtype != np.float32:
+            raise ValueError(f"Output buffer must be float32 with shape {(len(df), len(names))}")
+
+        n_numeric = len(self.numeric_columns)
+        for i, col in enumerate(self.numeric_columns):
+            values = df[col]
+            if pd.api.types.is_timedelta64_dtype(values):
+                # Durations such as avg_transfer_time are expressed in days
+                values = values.dt.total_seconds() / 86400
+            out[:, i] = values.to_numpy(dtype=np.float32, na_value=np.nan)
+
+        out[:, n_numeric:] = 0
+        offset = n_numeric
+        rows = np.arange(len(df))
+        for col in self.categorical_columns:
+            categories = self.vocabulary[col]
+            codes = pd.Categorical(df[col].astype(str).where(df[col].notna()), categories=categories).codes
+            present = codes >= 1
+            out[rows[present], offset + codes[present] - 1] = 1
+            offset += len(categories) - 1
+        return out
+
+    def fit_transform(self, df: pd.DataFrame) -> np.ndarray:
+        return self.fit(df).transform(df)
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {'numeric_columns': self.numeric_columns, 'categorical_columns': self.categorical_columns,
+                'vocabulary': self.vocabulary}
+
+    @classmethod
+    def from_metadata(cls, metadata: Dict[str, Any]) -> 'FeaturePipeline':
+        pipeline = cls(metadata['numeric_columns'], metadata['categorical_columns'])
+        pipeline.vocabulary = metadata['vocabulary']
+        return pipeline
+
+class FeatureCache:
+    # Featurised arrays on disk, keyed by the staged dataset version and the
+    # feature pipeline that produced them. Entries are memory-mapped on read.
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, dataset_version: str, pipeline_key: str) -> str:
+        return os.path.join(self.directory, f"{dataset_version}-{pipeline_key}.joblib")
+
+    def get(self, dataset_version: str, pipeline_key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(dataset_version, pipeline_key)
+        if not os.path.exists(path):
+            return None
+        logger.info(f"Feature cache hit for dataset version {dataset_version}")
+        return joblib.load(path, mmap_mode='r')
+
+    def put(self, dataset_version: str, pipeline_key: str, entry: Dict[str, Any]):
+        path = self._path(dataset_version, pipeline_key)
+        # Written under a temporary name so a concurrent reader never sees half a file
+        joblib.dump(entry, path + '.tmp', compress=0)
+        os.replace(path + '.tmp', path)
+
+    def fetch(self, dataset_version: str, features: FeaturePipeline,
+              compute: Callable[[], Dict[str, np.ndarray]]) -> Tuple[Dict[str, np.ndarray], FeaturePipeline]:
+        # compute() featurises the dataset, fitting `features` first if needed.
+        # On a hit, the pipeline that produced the cached arrays is returned.
+        pipeline_key = features.version
+        entry = self.get(dataset_version, pipeline_key)
+        if entry is None:
+            arrays = compute()
+            self.put(dataset_version, pipeline_key, {'arrays': arrays, 'features': features.to_metadata()})
+            return arrays, features
+        return entry['arrays'], FeaturePipeline.from_metadata(entry['features'])
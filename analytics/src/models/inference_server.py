@@ -0,0 +1,221 @@
+# analytics/src/models/inference_server.py
+
+import numpy as np
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from flask import Flask, request, jsonify
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import os
+import sys
+
+# Run as a script: make the analytics/src packages importable
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.predictive_model import SupplyChainPredictiveModel  # noqa: E402
+from models.anomaly_detection import SupplyChainAnomalyDetection  # noqa: E402
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    # Coalesces concurrent requests into one model call. The worker takes the
+    # first waiting request, then keeps collecting until max_batch_size rows are
+    # queued or max_wait_ms has passed, and scores everything with one predict.
+    def __init__(self, name: str, predict_fn: Callable[[np.ndarray], np.ndarray],
+                 max_batch_size: int = 256, max_wait_ms: float = 5.0, n_features: Optional[int] = None,
+                 stats_window: int = 10000):
+        self.name = name
+        self.predict_fn = predict_fn
+        self.n_features = n_features
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.latencies = deque(maxlen=stats_window)
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._worker = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, rows: np.ndarray) -> Future:
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        # Checked here so one malformed request cannot fail the batch it would join
+        if rows.ndim != 2 or (self.n_features is not None and rows.shape[1] != self.n_features):
+            raise ValueError(f"Expected rows of {self.n_features} features, got shape {rows.shape}")
+        if not np.isfinite(rows).all():
+            raise ValueError("Rows must not contain NaN or infinite values")
+        future = Future()
+        with self._cond:
+            if self._stop:
+                raise RuntimeError(f"Batcher {self.name} is stopped")
+            self._pending.append((rows, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def predict(self, rows: np.ndarray, timeout: float = 30.0) -> np.ndarray:
+        return self.submit(rows).result(timeout=timeout)
+
+    def _next_batch(self) -> List[Tuple[np.ndarray, Future, float]]:
+        with self._cond:
+            while not self._pending and not self._stop:
+                self._cond.wait()
+            if not self._pending:
+                return []
+            batch = [self._pending.popleft()]
+            size = len(batch[0][0])
+            deadline = batch[0][2] + self.max_wait
+            while size < self.max_batch_size:
+                if not self._pending:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0 or self._stop:
+                        break
+                    self._cond.wait(timeout=remaining)
+                    continue
+                # A request is never split, so a batch can exceed max_batch_size by one request
+                batch.append(self._pending.popleft())
+                size += len(batch[-1][0])
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                results = self.predict_fn(np.vstack([rows for rows, _, _ in batch]))
+            except Exception as e:
+                logger.error(f"Error scoring batch of {len(batch)} requests in {self.name}: {str(e)}")
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    # Scored one request at a time, so only the request that
+                    # fails on its own gets the error
+                    self._run_each(batch)
+                continue
+
+            offset = 0
+            done = time.perf_counter()
+            for rows, future, submitted in batch:
+                future.set_result(results[offset:offset + len(rows)])
+                offset += len(rows)
+                self.latencies.append(done - submitted)
+            self.requests += len(batch)
+            self.rows += offset
+            self.batches += 1
+
+    def _run_each(self, batch: List[Tuple[np.ndarray, Future, float]]):
+        for rows, future, submitted in batch:
+            try:
+                result = self.predict_fn(rows)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            future.set_result(result)
+            self.latencies.append(time.perf_counter() - submitted)
+            self.requests += 1
+            self.rows += len(rows)
+            self.batches += 1
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        self._worker.join()
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = np.array(self.latencies) * 1000
+        elapsed = time.perf_counter() - self.started
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'avg_batch_rows': self.rows / self.batches if self.batches else 0.0,
+            'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+            'requests_per_second': self.requests / elapsed,
+            'rows_per_second': self.rows / elapsed
+        }
+
+class InferenceServer:
+    # Loads each model once and serves it over HTTP. Run it as a single
+    # multi-threaded process so concurrent requests share one batcher.
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.batchers = {}
+        max_batch_size = config.get('inference_max_batch_size', 256)
+        max_wait_ms = config.get('inference_max_wait_ms', 5.0)
+
+        if config.get('predictive_model_path'):
+            predictive_model = SupplyChainPredictiveModel(config)
+            predictive_model.load_model(config['predictive_model_path'])
+            self.batchers['predict'] = MicroBatcher(
+                'predict', predictive_model.predict, max_batch_size, max_wait_ms,
+                n_features=predictive_model.model.named_steps['scaler'].n_features_in_)
+        if config.get('anomaly_model_path'):
+            anomaly_detector = SupplyChainAnomalyDetection(config)
+            anomaly_detector.load_model(config['anomaly_model_path'])
+            self.batchers['detect_anomalies'] = MicroBatcher(
+                'detect_anomalies', anomaly_detector.detect_anomalies, max_batch_size, max_wait_ms,
+                n_features=anomaly_detector.scaler.n_features_in_)
+
+        self.app = Flask(__name__)
+        self.setup_routes()
+
+    def setup_routes(self):
+        @self.app.route('/health', methods=['GET'])
+        def health():
+            return jsonify({'status': 'ok', 'models': list(self.batchers)})
+
+        @self.app.route('/stats', methods=['GET'])
+        def stats():
+            return jsonify({name: batcher.get_stats() for name, batcher in self.batchers.items()})
+
+        @self.app.route('/<model_name>', methods=['POST'])
+        def score(model_name):
+            batcher = self.batchers.get(model_name)
+            if batcher is None:
+                return jsonify({'error': f"Unknown model: {model_name}"}), 404
+
+            # Accepts one instance ({"instance": [...]}) or several ({"instances": [[...], ...]})
+            payload = request.get_json(force=True)
+            if not isinstance(payload, dict):
+                return jsonify({'error': "Invalid request: body must be a JSON object"}), 400
+            single = 'instance' in payload
+            try:
+                future = batcher.submit([payload['instance']] if single else payload['instances'])
+            except (KeyError, TypeError, ValueError) as e:
+                return jsonify({'error': f"Invalid request: {str(e)}"}), 400
+            except RuntimeError as e:
+                return jsonify({'error': str(e)}), 503
+            try:
+                result = future.result(timeout=self.config.get('inference_timeout_seconds', 30.0))
+            except FutureTimeoutError:
+                return jsonify({'error': f"Timed out waiting for {model_name}"}), 503
+            result = result.tolist()
+            return jsonify({'prediction': result[0]} if single else {'predictions': result})
+
+    def stop(self):
+        for batcher in self.batchers.values():
+            batcher.stop()
+
+    def run(self):
+        self.app.run(host=self.config.get('inference_host', '127.0.0.1'),
+                     port=self.config.get('inference_port', 8060), threaded=True)
+
+if __name__ == "__main__":
+    config = {
+        'predictive_model_path': 'supply_chain_model.joblib',
+        'anomaly_model_path': 'supply_chain_anomaly_model.joblib',
+        'inference_max_batch_size': 256,
+        'inference_max_wait_ms': 5.0,
+        'inference_port': 8060
+    }
+    server = InferenceServer(config)
+    server.run()
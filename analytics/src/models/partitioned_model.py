@@ -0,0 +1,266 @@
+# analytics/src/models/partitioned_model.py
+
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import logging
+import multiprocessing as mp
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, Callable, List, Optional
+import sys
+
+# Run as a script: make the analytics/src packages importable
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_processing.staging import StagingStore  # noqa: E402
+from models.predictive_model import SupplyChainPredictiveModel  # noqa: E402
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Registry key of the model trained on all partitions; it serves keys that
+# have no model of their own
+GLOBAL_KEY = '__global__'
+
+# Rough bytes per training row held by one forest tree: about 1.3 nodes per
+# bootstrapped row at full depth, each node stored by sklearn (72 bytes) and
+# again in the flat artifact arrays while saving (48 bytes)
+TREE_BYTES_PER_ROW = 1.3 * (72 + 48)
+
+def partition_row_cap(config: Dict[str, Any], n_columns: int) -> int:
+    # Most rows a worker trains on; bigger partitions are sampled down to it.
+    # partition_max_rows sets the cap directly. Otherwise it is estimated from
+    # partition_worker_memory_mb with the per-row sizes above: a sizing
+    # heuristic, not a measured or enforced limit on the worker's memory.
+    if config.get('partition_max_rows'):
+        return config['partition_max_rows']
+    budget = config.get('partition_worker_memory_mb', 2048) * 1024 ** 2
+    n_trees = config.get('forest_max_estimators', 300)
+    # The raw frame, the float32 feature matrix and the scaled copy
+    data_bytes = n_columns * (8 + 4 + 8)
+    return max(1, int(budget / (n_trees * TREE_BYTES_PER_ROW + data_bytes)))
+
+def partition_name(value: Any) -> str:
+    # Registry key of a partition value; nulls share the unknown partition
+    return StagingStore.UNKNOWN_PARTITION if pd.isna(value) else str(value)
+
+def _train_partition(config: Dict[str, Any], dataset: str, filters: list, key: str, path: str,
+                     max_rows: int) -> Dict[str, Any]:
+    # Runs in a pool worker: reads only its own partition from the staging
+    # store, trains single-threaded and saves the model as an artifact
+    start = time.perf_counter()
+    model = SupplyChainPredictiveModel(config)
+    df = model.load_staged_data(StagingStore(config), dataset, filters)
+    rows = len(df)
+    if rows > max_rows:
+        logger.info(f"Partition {key}: sampling {max_rows} of {rows} rows, the partition row cap")
+        df = df.sample(max_rows, random_state=42)
+
+    # Warm-start the search from the partition's previous parameters
+    model.best_params = model.load_best_params(path)
+    X, y = model.prepare_data(df)
+    model.train_model(X, y)
+    model.save_model(path)
+    return {
+        'path': path,
+        'model_version': model.model_metadata['model_version'],
+        'trained_at': model.model_metadata['created_at'],
+        'rows': rows,
+        'trained_rows': len(df),
+        'train_seconds': time.perf_counter() - start
+    }
+
+class ModelRegistry:
+    # Partition models keyed by partition value. registry.json maps each key to
+    # its artifact and the staged data version it was trained on; models are
+    # loaded lazily and reloaded when their entry points at a new version.
+    def __init__(self, directory: str, config: Dict[str, Any],
+                 model_config: Optional[Callable[[str], Dict[str, Any]]] = None):
+        self.directory = directory
+        self.config = config
+        # Config each key's model is loaded with; it must describe the feature
+        # pipeline the model was trained with, or load_model rejects the artifact
+        self.model_config = model_config or (lambda key: config)
+        self.index_path = os.path.join(directory, 'registry.json')
+        os.makedirs(directory, exist_ok=True)
+        self.entries = self._read_index()
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def refresh(self):
+        # Picks up partitions retrained by another process
+        self.entries = self._read_index()
+
+    def path_for(self, key: str) -> str:
+        # Readable and filesystem-safe, with a hash so distinct keys never collide
+        safe = re.sub(r'[^A-Za-z0-9_.-]+', '_', key)[:64]
+        return os.path.join(self.directory, f"{safe}-{hashlib.sha1(key.encode()).hexdigest()[:8]}.joblib")
+
+    def keys(self) -> List[str]:
+        return [key for key in self.entries if key != GLOBAL_KEY]
+
+    def register(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            entries = self._read_index()
+            entries[key] = entry
+            # Written under a temporary name so a concurrent reader never sees half a file
+            with open(self.index_path + '.tmp', 'w') as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+            os.replace(self.index_path + '.tmp', self.index_path)
+            self.entries = entries
+
+    def get(self, key: str) -> Optional[SupplyChainPredictiveModel]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        with self._lock:
+            cached = self._models.get(key)
+            if cached is None or cached[0] != entry['model_version']:
+                model = SupplyChainPredictiveModel(self.model_config(key))
+                model.load_model(entry['path'])
+                cached = self._models[key] = (entry['model_version'], model)
+        return cached[1]
+
+class PartitionedPredictiveModel:
+    # One SupplyChainPredictiveModel per value of partition_key (default
+    # category), trained in parallel worker processes and stored in a
+    # ModelRegistry. Partitions whose staged data has not changed since their
+    # model was trained are skipped, so one category can be refreshed alone.
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.key = config.get('partition_key', 'category')
+        self.min_rows = config.get('partition_min_rows', 1000)
+        self.registry = ModelRegistry(config.get('partition_registry_dir', 'partition_models'), config,
+                                      self._model_config)
+
+    def _model_config(self, key: str) -> Dict[str, Any]:
+        # Workers run side by side, so each trains single-threaded; the
+        # partition column is constant within a partition and is not encoded
+        config = {**self.config, 'model_format': 'artifact', 'search_n_jobs': 1, 'forest_n_jobs': 1}
+        if key != GLOBAL_KEY:
+            config['categorical_columns'] = [col for col in self.config.get('categorical_columns', ['category'])
+                                             if col != self.key]
+        return config
+
+    def train(self, dataset: str = 'cleaned_products', filters: list = None, keys: Optional[List[str]] = None,
+              force: bool = False) -> Dict[str, Dict[str, Any]]:
+        filters = list(filters or [])
+        store = StagingStore(self.config)
+        # Values keep the key column's staged dtype, so the filters below match
+        # numeric and date keys as well as strings
+        counts = store.read(dataset, columns=[self.key], filters=filters)[self.key].value_counts(dropna=False)
+
+        tasks = []
+        for value, rows in counts.items():
+            key = partition_name(value)
+            if keys is not None and key not in keys:
+                continue
+            if rows < self.min_rows:
+                logger.info(f"Partition {key} has {rows} rows, below partition_min_rows; "
+                            "served by the global model")
+                continue
+            if pd.isna(value):
+                key_filter = store.null_filter(dataset, self.key)
+            else:
+                key_filter = (self.key, '=', value.item() if isinstance(value, np.generic) else value)
+            tasks.append((key, filters + [key_filter], rows))
+        if self.config.get('partition_global_fallback', True) and (keys is None or GLOBAL_KEY in keys):
+            tasks.append((GLOBAL_KEY, filters, int(counts.sum())))
+
+        # Only partitions whose staged files changed since their model was trained
+        pending = []
+        for key, key_filters, rows in tasks:
+            data_version = store.version(dataset, key_filters)
+            if not force and self.registry.entries.get(key, {}).get('data_version') == data_version:
+                logger.info(f"Partition {key} is unchanged, keeping model "
+                            f"{self.registry.entries[key]['model_version']}")
+                continue
+            pending.append((key, key_filters, rows, data_version))
+        if not pending:
+            return {}
+
+        workers = min(len(pending), self.config.get('partition_workers', os.cpu_count()))
+        start = time.perf_counter()
+        trained = {}
+        # spawn keeps workers free of the parent's threads and open connections
+        with ProcessPoolExecutor(workers, mp_context=mp.get_context('spawn')) as pool:
+            futures = {}
+            # Largest partitions first, so the pool is not left waiting on one at the end
+            for key, key_filters, rows, data_version in sorted(pending, key=lambda task: -task[2]):
+                config = self._model_config(key)
+                n_columns = len(SupplyChainPredictiveModel(config).features.columns) + 1
+                max_rows = partition_row_cap(config, n_columns)
+                future = pool.submit(_train_partition, config, dataset, key_filters, key,
+                                     self.registry.path_for(key), max_rows)
+                futures[future] = (key, data_version)
+
+            for future in as_completed(futures):
+                key, data_version = futures[future]
+                try:
+                    entry = {**future.result(), 'data_version': data_version}
+                except Exception as e:
+                    logger.error(f"Error training partition {key}: {str(e)}")
+                    continue
+                self.registry.register(key, entry)
+                trained[key] = entry
+                logger.info(f"Partition {key}: trained on {entry['trained_rows']} rows "
+                            f"in {entry['train_seconds']:.1f}s")
+
+        logger.info(f"Trained {len(trained)} of {len(pending)} partitions with {workers} workers "
+                    f"in {time.perf_counter() - start:.1f}s")
+        return trained
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        # Rows are grouped by partition so each sub-model scores its rows in one
+        # batch; keys without a model fall back to the global model, or NaN
+        predictions = np.full(len(df), np.nan)
+        unserved = 0
+        for value, rows in df.groupby(self.key, sort=False, dropna=False).indices.items():
+            model = self.registry.get(partition_name(value)) or self.registry.get(GLOBAL_KEY)
+            if model is None:
+                unserved += len(rows)
+                continue
+            predictions[rows] = model.predict(model.features.transform(df.iloc[rows]))
+        if unserved:
+            logger.warning(f"No model for {unserved} rows; their predictions are NaN")
+        return predictions
+
+if __name__ == "__main__":
+    # Example usage
+    config = {
+        'staging_root': 'staging',
+        'partition_key': 'category',
+        'partition_registry_dir': 'partition_models',
+        'partition_workers': 32,
+        'partition_worker_memory_mb': 2048,
+        'search_mode': 'halving',
+        'search_max_fits': 60
+    }
+    model = PartitionedPredictiveModel(config)
+
+    # Train every partition whose staged data changed since the last run
+    trained = model.train()
+    logger.info(f"Retrained partitions: {sorted(trained)}")
+
+    # Refresh a single category
+    model.train(keys=['Electronics'], force=True)
+
+    # Make predictions
+    new_data = pd.DataFrame([
+        {'age_days': 100, 'price': 50.0, 'quantity': 1000, 'avg_transfer_time': 5, 'category': 'Electronics'},
+        {'age_days': 30, 'price': 12.5, 'quantity': 200, 'avg_transfer_time': 2, 'category': 'Food'}
+    ])
+    predictions = model.predict(new_data)
+    logger.info(f"Predictions: {predictions}")
@@ -2,14 +2,27 @@
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.model_selection import train_test_split, GridSearchCV, KFold, ParameterSampler, cross_val_score
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
+import json
 import logging
-from typing import Dict, Any, Tuple
+import math
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple
+import sys
+
+# Run as a script: make the analytics/src packages importable
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_processing.staging import StagingStore  # noqa: E402
+from models.features import FeatureCache, FeaturePipeline  # noqa: E402
+from models.artifacts import (FlatForest, FlatForestRegressor, check_artifact, is_artifact, load_artifact,  # noqa: E402
+                              save_artifact, scaler_arrays, scaler_from_arrays)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,24 +33,82 @@ class SupplyChainPredictiveModel:
         self.config = config
         self.model = None
         self.scaler = StandardScaler()
+        self.best_params = None
+        self.search_stats = {}
+        self.feature_names = config.get('feature_names')
+        self.model_metadata = None
+        # feature_columns/categorical_columns let partitioned models drop the
+        # column they are partitioned on
+        self.features = FeaturePipeline(config.get('feature_columns', self.FEATURES),
+                                        config.get('categorical_columns'))
+        self.feature_cache = FeatureCache(config['feature_cache_dir']) if config.get('feature_cache_dir') else None
+
+    MODEL_TYPE = 'predictive_random_forest'
+
+    FEATURES = ['age_days', 'price', 'quantity', 'avg_transfer_time']
+    TARGET = 'days_until_next_transfer'
+
+    # Tree structure is searched on small forests; the number of trees is
+    # chosen afterwards by growing the best forest until OOB R2 stops improving
+    SEARCH_SPACE = {
+        'rf__max_depth': [None, 10, 20, 30],
+        'rf__min_samples_split': [2, 5, 10],
+        'rf__min_samples_leaf': [1, 2, 4]
+    }
+
+    def load_staged_data(self, store: StagingStore, dataset: str = 'cleaned_products',
+                         filters: list = None) -> pd.DataFrame:
+        # Only the columns prepare_data uses are read from the staging store
+        return store.read(dataset, columns=self.features.columns + [self.TARGET], filters=filters)
 
     def prepare_data(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
-        # Select features and target
-        features = ['age_days', 'price', 'quantity', 'avg_transfer_time']
-        target = 'days_until_next_transfer'
+        # The category vocabulary is fitted on the first call only; later calls
+        # (and a loaded model) encode new batches into the same columns
+        if not self.features.is_fitted:
+            self.features.fit(df)
+        self.feature_names = self.features.feature_names
 
-        X = df[features]
-        y = df[target]
+        return self.features.transform(df), df[self.TARGET].to_numpy()
 
-        # Encode categorical variables
-        X = pd.get_dummies(X, columns=['category'], drop_first=True)
+    def load_features(self, store: StagingStore, dataset: str = 'cleaned_products',
+                      filters: list = None) -> Tuple[np.ndarray, np.ndarray]:
+        # Featurised data is reused across runs until the staged files change
+        def compute():
+            X, y = self.prepare_data(self.load_staged_data(store, dataset, filters))
+            return {'X': X, 'y': y}
 
-        return X.values, y.values
+        if self.feature_cache is None:
+            arrays = compute()
+        else:
+            arrays, self.features = self.feature_cache.fetch(store.version(dataset, filters), self.features, compute)
+            self.feature_names = self.features.feature_names
+        return arrays['X'], arrays['y']
 
     def train_model(self, X: np.ndarray, y: np.ndarray):
         # Split the data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
+        start = time.perf_counter()
+        if self.config.get('search_mode', 'grid') == 'grid':
+            self.model, fits = self._grid_search(X_train, y_train)
+        else:
+            best_params, fits = self._budgeted_search(X_train, y_train)
+            self.model = self._fit_early_stopped(X_train, y_train, best_params)
+        elapsed = time.perf_counter() - start
+        self.best_params = {name: value for name, value in self.model.get_params().items()
+                            if name in self.SEARCH_SPACE or name == 'rf__n_estimators'}
+        self.search_stats = {'fits': fits, 'seconds': elapsed, 'fits_per_second': fits / elapsed}
+        logger.info(f"Hyperparameter search: {fits} fits in {elapsed:.1f}s ({fits / elapsed:.2f} fits/s)")
+
+        # Evaluate the model
+        y_pred = self.model.predict(X_test)
+        mse = mean_squared_error(y_test, y_pred)
+        r2 = r2_score(y_test, y_pred)
+
+        logger.info(f"Model trained. MSE: {mse}, R2 Score: {r2}")
+        logger.info(f"Best parameters: {self.best_params}")
+
+    def _grid_search(self, X: np.ndarray, y: np.ndarray) -> Tuple[Pipeline, int]:
         # Create a pipeline
         pipeline = Pipeline([
             ('scaler', StandardScaler()),
@@ -53,19 +124,92 @@ class SupplyChainPredictiveModel:
         }
 
         # Perform grid search
-        grid_search = GridSearchCV(pipeline, param_grid, cv=5, n_jobs=-1, verbose=1)
-        grid_search.fit(X_train, y_train)
+        grid_search = GridSearchCV(pipeline, param_grid, cv=5, n_jobs=self.config.get('search_n_jobs', -1),
+                                   verbose=1)
+        grid_search.fit(X, y)
+        return grid_search.best_estimator_, len(grid_search.cv_results_['params']) * 5 + 1
 
-        # Get the best model
-        self.model = grid_search.best_estimator_
+    def _search_candidates(self) -> List[Dict[str, Any]]:
+        candidates = list(ParameterSampler(self.SEARCH_SPACE, self.config.get('search_candidates', 27),
+                                           random_state=42))
+        if self.best_params:
+            # Warm start: the previous winner is scored first, so it survives a tight budget
+            previous = {name: value for name, value in self.best_params.items() if name in self.SEARCH_SPACE}
+            candidates = [previous] + [params for params in candidates if params != previous]
+        return candidates
 
-        # Evaluate the model
-        y_pred = self.model.predict(X_test)
-        mse = mean_squared_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
+    def _budgeted_search(self, X: np.ndarray, y: np.ndarray) -> Tuple[Dict[str, Any], int]:
+        # Successive halving: every candidate is scored on a small subsample, and
+        # only the best 1/factor move on to a factor-times larger one. Stops early
+        # once search_max_fits or search_time_budget_seconds is used up.
+        max_fits = self.config.get('search_max_fits', 150)
+        time_budget = self.config.get('search_time_budget_seconds', 1800)
+        factor = self.config.get('search_halving_factor', 3)
+        cv = self.config.get('search_cv', 3)
+        pipeline = Pipeline([
+            ('scaler', StandardScaler()),
+            ('rf', RandomForestRegressor(n_estimators=self.config.get('search_n_estimators', 50),
+                                         random_state=42))
+        ])
 
-        logger.info(f"Model trained. MSE: {mse}, R2 Score: {r2}")
-        logger.info(f"Best parameters: {grid_search.best_params_}")
+        candidates = self._search_candidates()
+        rungs = max(1, math.ceil(math.log(len(candidates), factor)))
+        n_samples = max(self.config.get('search_min_samples', 500), len(X) // factor ** (rungs - 1))
+        order = np.random.default_rng(42).permutation(len(X))
+
+        start = time.perf_counter()
+        fits = 0
+        best = candidates[0]
+        survivors = candidates
+        for rung in range(rungs):
+            rows = order[:min(n_samples, len(X))]
+            scores = []
+            for params in survivors:
+                if fits + cv > max_fits or time.perf_counter() - start > time_budget:
+                    break
+                scores.append(cross_val_score(pipeline.set_params(**params), X[rows], y[rows],
+                                              cv=KFold(cv, shuffle=True, random_state=42),
+                                              n_jobs=self.config.get('search_n_jobs', -1)).mean())
+                fits += cv
+            if not scores:
+                break
+
+            ranked = np.argsort(scores)[::-1]
+            best = survivors[ranked[0]]
+            elapsed = time.perf_counter() - start
+            logger.info(f"Search rung {rung}: {len(scores)} candidates on {len(rows)} rows, "
+                        f"best score {scores[ranked[0]]:.4f}, {fits} fits at {fits / elapsed:.2f} fits/s")
+            if len(scores) < len(survivors):
+                logger.info("Search budget exhausted, keeping the best candidate so far")
+                break
+            survivors = [survivors[i] for i in ranked[:max(1, len(survivors) // factor)]]
+            if len(rows) == len(X) or len(survivors) == 1:
+                break
+            n_samples *= factor
+        return best, fits
+
+    def _fit_early_stopped(self, X: np.ndarray, y: np.ndarray, params: Dict[str, Any]) -> Pipeline:
+        # Grow the forest in steps with warm_start and stop once the out-of-bag
+        # R2 improves by less than forest_tolerance
+        step = self.config.get('forest_step', 50)
+        max_trees = self.config.get('forest_max_estimators', 300)
+        tolerance = self.config.get('forest_tolerance', 1e-3)
+
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        rf = RandomForestRegressor(n_estimators=step, warm_start=True, oob_score=True, random_state=42,
+                                   n_jobs=self.config.get('forest_n_jobs', -1),
+                                   **{name[len('rf__'):]: value for name, value in params.items()})
+        rf.fit(X_scaled, y)
+        while rf.n_estimators < max_trees:
+            previous = rf.oob_score_
+            rf.set_params(n_estimators=rf.n_estimators + step)
+            rf.fit(X_scaled, y)
+            if rf.oob_score_ - previous < tolerance:
+                break
+        logger.info(f"Forest stopped at {rf.n_estimators} trees, OOB R2 {rf.oob_score_:.4f}")
+        rf.set_params(warm_start=False)
+        return Pipeline([('scaler', scaler), ('rf', rf)])
 
     def predict(self, X: np.ndarray) -> np.ndarray:
         if self.model is None:
@@ -75,19 +219,64 @@ class SupplyChainPredictiveModel:
     def save_model(self, filepath: str):
         if self.model is None:
             raise ValueError("Model has not been trained yet.")
-        joblib.dump(self.model, filepath)
+        if self.config.get('model_format', 'artifact') == 'artifact':
+            self.model_metadata = self._save_artifact(filepath)
+        else:
+            joblib.dump(self.model, filepath)
+        if self.best_params is not None:
+            # Kept next to the model so the next retrain can warm-start its search
+            with open(self.params_path(filepath), 'w') as f:
+                json.dump(self.best_params, f)
         logger.info(f"Model saved to {filepath}")
 
+    def _save_artifact(self, filepath: str) -> Dict[str, Any]:
+        scaler = self.model.named_steps['scaler']
+        rf = self.model.named_steps['rf']
+        forest = rf.forest if isinstance(rf, FlatForestRegressor) else FlatForest.from_estimators(rf.estimators_)
+        arrays = {**scaler_arrays(scaler), **forest.to_arrays(), 'feature_importances': rf.feature_importances_}
+        feature_names = self.feature_names or [f"feature_{i}" for i in range(scaler.n_features_in_)]
+        features = self.features.to_metadata() if self.features.is_fitted else None
+        return save_artifact(filepath, self.MODEL_TYPE, feature_names, arrays, {'max_depth': forest.max_depth},
+                             features)
+
     def load_model(self, filepath: str):
-        self.model = joblib.load(filepath)
+        # Artifacts are memory-mapped, so worker processes share one copy of the forest
+        loaded = load_artifact(filepath, mmap=self.config.get('model_mmap', True))
+        if is_artifact(loaded):
+            metadata = check_artifact(loaded, self.MODEL_TYPE, self.features, self.feature_names)
+            arrays = loaded['arrays']
+            forest = FlatForest(arrays, metadata['params']['max_depth'])
+            self.model = Pipeline([
+                ('scaler', scaler_from_arrays(arrays)),
+                ('rf', FlatForestRegressor(forest, arrays['feature_importances'], metadata['schema']['n_features']))
+            ])
+            self.feature_names = metadata['feature_names']
+            self.model_metadata = metadata
+            if metadata['features'] is not None:
+                self.features = FeaturePipeline.from_metadata(metadata['features'])
+        else:
+            self.model = loaded
+        self.best_params = self.load_best_params(filepath)
         logger.info(f"Model loaded from {filepath}")
 
+    @staticmethod
+    def params_path(filepath: str) -> str:
+        return os.path.splitext(filepath)[0] + '_params.json'
+
+    def load_best_params(self, filepath: str) -> Optional[Dict[str, Any]]:
+        path = self.params_path(filepath)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
     def feature_importance(self) -> pd.DataFrame:
         if self.model is None:
             raise ValueError("Model has not been trained yet.")
         
-        feature_importance = self.model.named_steps['rf'].feature_importances_
-        feature_names = self.model.named_steps['rf'].feature_names_in_
+        rf = self.model.named_steps['rf']
+        feature_importance = rf.feature_importances_
+        feature_names = self.feature_names or getattr(rf, 'feature_names_in_', None)
         
         importance_df = pd.DataFrame({'feature': feature_names, 'importance': feature_importance})
         importance_df = importance_df.sort_values('importance', ascending=False)
@@ -96,18 +285,27 @@ class SupplyChainPredictiveModel:
 
 if __name__ == "__main__":
     # Example usage
-    config = {}  # Add any necessary configuration
+    config = {
+        'staging_root': 'staging',
+        'search_mode': 'halving',
+        'search_max_fits': 150,
+        'search_time_budget_seconds': 1800,
+        'feature_cache_dir': 'feature_cache'
+    }
     model = SupplyChainPredictiveModel(config)
 
-    # Load and prepare your data
-    df = pd.read_csv('your_cleaned_data.csv')
-    X, y = model.prepare_data(df)
+    # Warm-start the search from the last saved model's parameters
+    model.best_params = model.load_best_params('supply_chain_model.joblib')
+
+    # Load and prepare your data (featurised once per staged dataset version)
+    X, y = model.load_features(StagingStore(config))
 
     # Train the model
     model.train_model(X, y)
 
     # Make predictions
-    new_data = np.array([[100, 50.0, 1000, 5]])  # Example new data point
+    new_data = model.features.transform(pd.DataFrame([{  # Example new data point
+        'age_days': 100, 'price': 50.0, 'quantity': 1000, 'avg_transfer_time': 5, 'category': 'Electronics'}]))
     prediction = model.predict(new_data)
     logger.info(f"Prediction: {prediction}")
 
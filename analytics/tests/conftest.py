@@ -0,0 +1,7 @@
+# analytics/tests/conftest.py
+
+import os
+import sys
+
+# The analytics modules are imported as top-level packages from analytics/src
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
@@ -0,0 +1,20 @@
+# analytics/tests/test_anomaly_detection.py
+
+import numpy as np
+
+from models.anomaly_detection import SupplyChainAnomalyDetection
+
+def test_incremental_update_keeps_per_tree_state_aligned():
+    rng = np.random.default_rng(0)
+    detector = SupplyChainAnomalyDetection({'n_estimators': 20, 'incremental_replace_fraction': 0.1})
+    detector.train_model(rng.normal(size=(1000, 4)), 0.05)
+    old_seeds = np.array(detector.model._seeds)
+
+    update = detector.update_model(rng.normal(size=(300, 4)))
+    assert update['mode'] == 'incremental'
+    model = detector.model
+    assert len(model.estimators_) == len(model.estimators_features_) == len(model._seeds) == 20
+    assert len(model.estimators_samples_) == 20
+    # The kept trees keep their seeds, in order, ahead of the new trees
+    assert model._seeds[:18].tolist() == old_seeds[2:].tolist()
+    assert np.isfinite(model.score_samples(rng.normal(size=(10, 4)))).all()
@@ -0,0 +1,46 @@
+# analytics/tests/test_artifacts.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.anomaly_detection import SupplyChainAnomalyDetection
+
+def frame(rows=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'price': rng.gamma(2.0, 25.0, rows),
+        'quantity': rng.integers(1, 1000, rows),
+        'avg_transfer_time': rng.uniform(1, 10, rows),
+        'age_days': rng.integers(0, 720, rows),
+        'category': rng.choice(['Food', 'Toys', 'Pharma'], rows)
+    })
+
+@pytest.fixture
+def artifact_path(tmp_path):
+    detector = SupplyChainAnomalyDetection({'n_estimators': 10})
+    detector.train_model(detector.prepare_data(frame()), 0.05)
+    path = str(tmp_path / 'detector.joblib')
+    detector.save_model(path)
+    return path
+
+def test_load_checks_feature_names_by_default(artifact_path):
+    detector = SupplyChainAnomalyDetection({})
+    detector.load_model(artifact_path)
+    assert detector.feature_names == ['price', 'quantity', 'avg_transfer_time', 'age_days',
+                                      'category_Pharma', 'category_Toys']
+
+@pytest.mark.parametrize('config', [
+    {'categorical_columns': []},
+    {'feature_columns': ['quantity', 'price', 'avg_transfer_time', 'age_days']},
+    {'categorical_columns': ['category', 'manufacturer']}
+])
+def test_load_rejects_a_different_feature_pipeline(artifact_path, config):
+    with pytest.raises(ValueError):
+        SupplyChainAnomalyDetection(config).load_model(artifact_path)
+
+def test_load_rejects_a_fitted_pipeline_with_another_vocabulary(artifact_path):
+    detector = SupplyChainAnomalyDetection({})
+    detector.encode_data(frame().assign(category='Food'))
+    with pytest.raises(ValueError):
+        detector.load_model(artifact_path)
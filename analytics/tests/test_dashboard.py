@@ -0,0 +1,30 @@
+# analytics/tests/test_dashboard.py
+
+from datetime import datetime
+
+import pandas as pd
+
+from visualization.dashboard import SupplyChainDashboard
+
+def rows(product_ids, last_updated, transfer_dates):
+    return pd.DataFrame({'product_id': product_ids, 'last_updated': pd.to_datetime(last_updated),
+                         'transfer_date': pd.to_datetime(transfer_dates)})
+
+def test_watermarks_are_kept_per_column(monkeypatch):
+    dashboard = SupplyChainDashboard({'sql_connection_string': 'sqlite://', 'jwt_secret': 'secret',
+                                      'data_incremental_refresh': True, 'data_window_days': 100000})
+    # Product 2's transfer is future-dated; it must not hide product edits
+    # made after the products watermark
+    full = rows([1, 2], ['2024-01-01', '2024-01-02'], ['2024-01-01', '2030-01-01'])
+    delta = rows([3], ['2024-01-03'], [None])
+    requested = []
+    monkeypatch.setattr(dashboard, 'load_data', lambda: full)
+    monkeypatch.setattr(dashboard, 'load_data_since', lambda watermarks: requested.append(watermarks) or delta)
+
+    dashboard.refresh_data()
+    frame = dashboard.refresh_data()
+    assert requested == [{'last_updated': datetime(2024, 1, 2), 'transfer_date': datetime(2030, 1, 1)}]
+    assert sorted(frame['product_id']) == [1, 2, 3]
+
+    dashboard.refresh_data()
+    assert requested[-1] == {'last_updated': datetime(2024, 1, 3), 'transfer_date': datetime(2030, 1, 1)}
@@ -0,0 +1,64 @@
+# analytics/tests/test_data_cleaner.py
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from data_processing.data_cleaner import DataCleaner
+
+def products(product_ids, prices, start=0):
+    n = len(product_ids)
+    return pd.DataFrame({
+        'product_id': np.asarray(product_ids, dtype=np.int64),
+        'name': [f"product-{i}" for i in product_ids],
+        'category': ['Food' if i % 2 else 'Toys' for i in product_ids],
+        'price': np.asarray(prices, dtype=np.float64),
+        'quantity': np.arange(start, start + n) % 50 + 1,
+        'age_days': np.arange(start, start + n) % 300,
+        'last_updated': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(start, start + n), 's')
+    })
+
+def test_chunks_share_one_schema(tmp_path):
+    # The first chunk fits int16 on its own, the second does not
+    first = products(range(0, 1000), np.linspace(10, 20, 1000))
+    second = products(range(100000, 101000), np.linspace(10, 20, 1000), start=1000)
+    cleaner = DataCleaner({'imputation_strategy': 'grouped_median'})
+    cleaned = list(cleaner.clean_data_chunked(lambda: iter([first.copy(), second.copy()])))
+
+    assert cleaned[0].dtypes.to_dict() == cleaned[1].dtypes.to_dict()
+    for i, chunk in enumerate(cleaned):
+        pq.write_table(pa.Table.from_pandas(chunk, preserve_index=False), tmp_path / f"part-{i}.parquet")
+    staged = ds.dataset(str(tmp_path)).to_table().to_pandas()
+    assert len(staged) == sum(len(chunk) for chunk in cleaned)
+    assert staged['product_id'].max() == 100999
+
+def test_pass_two_does_not_fill_from_later_chunks():
+    # Product 1's first reading is missing; its only later reading (999.0)
+    # is in the last chunk and must not be carried back into the first one
+    first = products([1, 2, 3, 4], [np.nan, 10.0, 11.0, 12.0])
+    last = products([1, 5, 6, 7], [999.0, 13.0, 14.0, 15.0], start=10)
+    cleaner = DataCleaner({'imputation_strategy': 'forward_fill', 'max_category_ratio': 0.0})
+    chunk_stats = cleaner.collect_chunk_statistics(iter([first.copy(), last.copy()]), ['age_days', 'price', 'quantity'])
+    assert cleaner.imputer.last_values is None
+
+    cleaned = next(cleaner.clean_data_chunked(lambda: iter([first.copy(), last.copy()])))
+    median = cleaner.imputer.fallback_values['price']
+    assert median < 999.0
+    mean, std = chunk_stats['scaling']['price']
+    price = cleaned.loc[cleaned['product_id'] == 1, 'price'].iloc[0] * std + mean
+    assert np.isclose(price, median, rtol=1e-3)
+
+def test_imputer_is_fitted_from_all_chunks():
+    first = products(range(0, 10), np.full(10, 10.0))
+    last = products(range(10, 40), np.r_[np.full(29, 30.0), np.nan], start=10)
+    cleaner = DataCleaner({'imputation_strategy': 'grouped_median'})
+    cleaner.collect_chunk_statistics(iter([first, last]), ['age_days', 'price', 'quantity'])
+    assert np.isclose(cleaner.imputer.fallback_values['price'], 30.0, rtol=0.02)
+
+def test_efficient_cleaning_keeps_wide_product_ids():
+    ids = [2**31 - 1, 2**31, 2**40]
+    df = products(ids, [10.0, 11.0, 12.0]).assign(manufacturing_date=pd.Timestamp('2023-01-01'))
+    cleaned = DataCleaner({'memory_efficient': True, 'imputation_strategy': 'grouped_median'}).clean_data(df)
+    assert sorted(cleaned['product_id'].tolist()) == ids
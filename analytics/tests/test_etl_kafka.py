@@ -0,0 +1,134 @@
+# analytics/tests/test_etl_kafka.py
+
+import json
+import time
+from collections import namedtuple
+
+import pandas as pd
+import pytest
+
+from data_processing.etl import SupplyChainETL
+
+Message = namedtuple('Message', ['offset', 'value'])
+
+class FakeConsumer:
+    # One in-process partition with kafka-python's position/commit semantics:
+    # poll() advances the position, commit() stores it, seek() moves it back
+    PARTITION = ('supplychain_events', 0)
+
+    def __init__(self, values):
+        self.messages = [Message(offset, value) for offset, value in enumerate(values)]
+        self.position_ = 0
+        self.committed_ = None
+        self.commits = []
+
+    def poll(self, timeout_ms=0, max_records=None):
+        batch = self.messages[self.position_:self.position_ + max_records]
+        if not batch:
+            time.sleep(min(timeout_ms, 5) / 1000)
+            return {}
+        self.position_ += len(batch)
+        return {self.PARTITION: batch}
+
+    def commit(self):
+        self.committed_ = self.position_
+        self.commits.append(self.position_)
+
+    def assignment(self):
+        return {self.PARTITION}
+
+    def committed(self, tp):
+        return self.committed_
+
+    def seek(self, tp, offset):
+        self.position_ = offset
+
+    def seek_to_beginning(self, tp):
+        self.position_ = 0
+
+    def position(self, tp):
+        return self.position_
+
+    def end_offsets(self, partitions):
+        return {tp: len(self.messages) for tp in partitions}
+
+def event(i):
+    return json.dumps({'device_id': f"pallet-{i % 3}", 'timestamp': f"2024-01-01T00:00:{i:02d}",
+                       'temperature': 20.0 + i, 'motion': i % 2 == 0}).encode()
+
+@pytest.fixture
+def etl(tmp_path):
+    return SupplyChainETL({
+        'sql_connection_string': f"sqlite:///{tmp_path / 'analytics.db'}",
+        'mongo_connection_string': 'mongodb://localhost:27017/',
+        'mongo_db_name': 'supplychain',
+        'kafka_max_records': 4,
+        'kafka_linger_ms': 20,
+        'kafka_max_retries': 2
+    })
+
+def consume(etl, values, **kwargs):
+    etl._kafka_consumer = FakeConsumer(values)
+    return etl.consume_kafka_batches(stop_when_idle=True, **kwargs)
+
+def loaded(etl):
+    return pd.read_sql('SELECT * FROM analytics_iot_events', etl.sql_engine)
+
+def test_commits_after_each_loaded_batch_and_stops_when_idle(etl):
+    stats = consume(etl, [event(i) for i in range(10)])
+    assert stats['messages'] == 10
+    assert stats['batches'] == 3
+    assert etl.kafka_consumer.commits == [4, 8, 10]
+    assert stats['lag'] == 0
+    assert len(loaded(etl)) == 10
+
+def test_failed_load_is_not_committed_and_is_replayed(etl, monkeypatch):
+    load_data = etl.load_data
+    calls = []
+
+    def flaky_load(data, table_name):
+        calls.append(len(data))
+        if len(calls) == 2:
+            # The first batch is committed; the second fails before its commit
+            assert etl.kafka_consumer.committed_ == 4
+            raise ConnectionError("database went away")
+        return load_data(data, table_name)
+
+    monkeypatch.setattr(etl, 'load_data', flaky_load)
+    stats = consume(etl, [event(i) for i in range(10)])
+    assert calls == [4, 4, 4, 2]
+    assert etl.kafka_consumer.commits == [4, 8, 10]
+    assert stats['messages'] == 10
+    assert sorted(loaded(etl)['temperature']) == [20.0 + i for i in range(10)]
+
+def test_persistent_load_failure_raises_without_committing(etl, monkeypatch):
+    def failing_load(data, table_name):
+        raise ConnectionError("database went away")
+
+    monkeypatch.setattr(etl, 'load_data', failing_load)
+    with pytest.raises(ConnectionError):
+        consume(etl, [event(i) for i in range(4)])
+    assert etl.kafka_consumer.commits == []
+    assert etl.kafka_consumer.position_ == 4
+
+def test_malformed_messages_are_skipped_not_retried(etl):
+    values = [event(0), b'{not json', b'[1, 2]', event(1), b'\xff', event(2)]
+    stats = consume(etl, values)
+    assert stats['messages'] == 6
+    assert stats['skipped'] == 3
+    assert etl.kafka_consumer.commits == [4, 6]
+    assert sorted(loaded(etl)['temperature']) == [20.0, 21.0, 22.0]
+
+def test_event_that_fails_transform_is_skipped(etl, monkeypatch):
+    transform = etl.transform_event_data
+
+    def strict_transform(events):
+        if any('poison' in e for e in events):
+            raise TypeError("unsupported event")
+        return transform(events)
+
+    monkeypatch.setattr(etl, 'transform_event_data', strict_transform)
+    stats = consume(etl, [event(0), json.dumps({'poison': True}).encode(), event(1)])
+    assert stats['skipped'] == 1
+    assert etl.kafka_consumer.commits == [3]
+    assert sorted(loaded(etl)['temperature']) == [20.0, 21.0]
@@ -0,0 +1,153 @@
+# analytics/tests/test_etl_load.py
+
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.etl import SupplyChainETL
+
+class FakeCopyCursor:
+    # Adds psycopg2's copy_expert to a SQLite cursor: COPY's CSV is parsed the
+    # way PostgreSQL does, converting each field by the column's declared type,
+    # so a value the DDL cannot accept fails here as it would on the server.
+    # Timestamps are stored in the text format SQLAlchemy writes for INSERTs.
+    PARSERS = {
+        'BIGINT': int,
+        'INTEGER': int,
+        'SMALLINT': int,
+        'FLOAT': float,
+        'REAL': float,
+        'BOOLEAN': lambda value: {'true': 1, 'false': 0}[value],
+        'TEXT': str,
+        'DATETIME': lambda value: pd.Timestamp(value).strftime('%Y-%m-%d %H:%M:%S.%f'),
+        'TIMESTAMP': lambda value: pd.Timestamp(value).strftime('%Y-%m-%d %H:%M:%S.%f')
+    }
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def copy_expert(self, sql, buffer):
+        table = sql.split('"')[1]
+        columns = {row[1]: row[2] for row in self.cursor.execute(f'PRAGMA table_info("{table}")').fetchall()}
+        names = list(columns)
+        rows = []
+        for record in csv.reader(buffer):
+            rows.append([None if field == SupplyChainETL.COPY_NULL else self.PARSERS[columns[name]](field)
+                         for name, field in zip(names, record)])
+        placeholders = ', '.join('?' for _ in names)
+        self.cursor.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', rows)
+
+class FakeCopyConnection:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return FakeCopyCursor(self.conn.cursor(*args, **kwargs))
+
+@pytest.fixture
+def etl(tmp_path, monkeypatch):
+    etl = SupplyChainETL({
+        'sql_connection_string': f"sqlite:///{tmp_path / 'analytics.db'}",
+        'mongo_connection_string': 'mongodb://localhost:27017/',
+        'mongo_db_name': 'supplychain',
+        'load_batch_size': 3
+    })
+    raw_connection = etl.sql_engine.raw_connection
+    monkeypatch.setattr(etl.sql_engine, 'raw_connection',
+                        lambda: FakeCopyConnection(raw_connection()))
+    return etl
+
+@pytest.fixture
+def products(etl):
+    # Three products: one with several transfers, one with a single transfer
+    # (so no gaps, NaT intervals) and one with a missing price and date
+    raw = pd.DataFrame({
+        'product_id': [1, 1, 1, 2, 3, 3],
+        'name': ['bolt', 'bolt', 'bolt', 'nut', 'gear', 'gear'],
+        'manufacturing_date': ['2024-01-01', '2024-01-01', '2024-01-01', '2023-06-15', '2024-03-01', '2024-03-01'],
+        'transfer_date': ['2024-02-01 08:00', '2024-02-05 20:00', '2024-02-06 00:00', '2024-01-10 00:00', '2024-03-10 00:00', None],
+        'shelf_life_days': [400, 400, 400, 100, 900, 900],
+        'price': [12345.67, 12345.67, 12345.67, 0.35, None, None],
+        'location': ['Rotterdam', 'Hamburg', 'Dubai', 'Santos', 'Mumbai', 'Mumbai'],
+        'latitude': [51.9225, 53.5511, 25.2048, -23.9608, 19.0760, 19.0760],
+        'longitude': [4.4792, 9.9937, 55.2708, -46.3336, 72.8777, 72.8777]
+    })
+    return etl.transform_product_data(raw)
+
+def read_table(etl, table_name, parse_dates=('manufacturing_date', 'transfer_date')):
+    return pd.read_sql(f'SELECT * FROM "{table_name}"', etl.sql_engine, parse_dates=list(parse_dates or []))
+
+def test_transform_covers_copy_dtypes(products):
+    kinds = {col: products[col].dtype.kind for col in products.columns}
+    assert {'i', 'f', 'b', 'm', 'M', 'O'} <= set(kinds.values())
+    assert products['avg_transfer_time'].isna().any()
+
+def test_copy_frame_matches_insert_representation(etl, products):
+    rendered = etl.copy_frame(products)
+    for col in ['avg_transfer_time', 'max_transfer_gap']:
+        expected = products[col].to_numpy('timedelta64[ns]').view(np.int64)
+        present = products[col].notna().to_numpy()
+        assert rendered[col][present].tolist() == expected[present].tolist()
+        assert rendered[col][~present].isna().all()
+    assert set(rendered['is_expired']) <= {'true', 'false'}
+
+    buffer = io.StringIO()
+    rendered.to_csv(buffer, index=False, header=False)
+    assert 'days' not in buffer.getvalue()
+    assert 'True' not in buffer.getvalue()
+
+def test_insert_fallback_loads_every_row(etl, products):
+    etl.load_data(products, 'analytics_products')
+    loaded = read_table(etl, 'analytics_products')
+    assert len(loaded) == len(products)
+    assert etl.load_stats['analytics_products']['rows'] == len(products)
+    gaps = products['max_transfer_gap'].to_numpy('timedelta64[ns]').view(np.int64)
+    present = products['max_transfer_gap'].notna().to_numpy()
+    assert loaded['max_transfer_gap'][present].astype(np.int64).tolist() == gaps[present].tolist()
+
+def test_copy_round_trips_like_insert(etl, products):
+    etl.load_data(products, 'insert_products')
+    etl.config['load_method'] = 'copy'
+    etl.load_data(products, 'copy_products')
+
+    inserted = read_table(etl, 'insert_products')
+    copied = read_table(etl, 'copy_products')
+    pd.testing.assert_frame_equal(copied, inserted, check_dtype=False)
+
+def test_copy_keeps_empty_strings_apart_from_nulls(etl):
+    events = pd.DataFrame({'device_id': ['a', '', None, 'b'], 'weight': [1.0, 2.0, 3.0, None]})
+    etl.load_data(events, 'insert_events')
+    etl.config['load_method'] = 'copy'
+    etl.load_data(events, 'copy_events')
+
+    copied = read_table(etl, 'copy_events', parse_dates=None)
+    pd.testing.assert_frame_equal(copied, read_table(etl, 'insert_events', parse_dates=None))
+    assert copied['device_id'].isna().tolist() == [False, False, True, False]
+    assert copied['device_id'].iloc[1] == ''
+
+def test_transform_keeps_float_precision(etl, products):
+    assert products['price'].dtype == np.float64
+    etl.load_data(products, 'analytics_products')
+    loaded = read_table(etl, 'analytics_products')
+    assert loaded['price'].iloc[0] == 12345.67
+    assert loaded['latitude'].tolist() == products['latitude'].tolist()
+
+def test_load_skips_repeated_and_previously_loaded_rows(etl, tmp_path):
+    etl.config['fingerprint_root'] = str(tmp_path / 'fingerprints')
+    etl.config['dedup_keys'] = {'events': ['device_id', 'timestamp']}
+    events = pd.DataFrame({'device_id': ['a', 'a', 'b', 'a'],
+                           'timestamp': ['t1', 't1', 't1', 't2'],
+                           'weight': [1.0, 1.5, 2.0, 3.0]})
+    loaded = etl.load_data(events, 'events')
+    assert loaded['weight'].tolist() == [1.0, 2.0, 3.0]
+    assert len(etl.load_data(events, 'events')) == 0
+    assert len(read_table(etl, 'events', parse_dates=None)) == 3
@@ -0,0 +1,57 @@
+# analytics/tests/test_imputation.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.imputation import ForwardFillImputer, GroupedMedianImputer, SampledKNNImputer
+
+def batch(product_ids, dates, prices):
+    return pd.DataFrame({'product_id': product_ids, 'last_updated': pd.to_datetime(dates), 'price': prices})
+
+def test_forward_fill_continues_series_from_fitted_history():
+    history = batch([1, 1, 2], ['2024-01-01', '2024-01-02', '2024-01-01'], [1.0, 2.0, 5.0])
+    new = batch([1, 1, 2], ['2024-01-03', '2024-01-04', '2024-01-02'], [np.nan, 3.0, np.nan])
+    imputer = ForwardFillImputer().fit(history, ['price'])
+    assert imputer.transform(new)['price'].tolist() == [2.0, 3.0, 5.0]
+
+def test_forward_fill_transform_is_stateless():
+    history = batch([1], ['2024-01-01'], [1.0])
+    new = batch([1, 1], ['2024-01-02', '2024-01-03'], [np.nan, 9.0])
+    imputer = ForwardFillImputer().fit(history, ['price'])
+    first = imputer.transform(new)
+    assert imputer.last_values['price'].tolist() == [1.0]
+    pd.testing.assert_frame_equal(imputer.transform(new), first)
+    assert new['price'].isna().sum() == 1
+
+def test_forward_fill_never_back_fills_a_leading_gap():
+    # Fitting on the batch being transformed must not fill its first row
+    # with the later observation; the gap falls back to the median instead
+    data = batch([1, 1, 2], ['2024-01-01', '2024-01-02', '2024-01-01'], [np.nan, 10.0, 4.0])
+    filled = ForwardFillImputer().fit_transform(data, ['price'])
+    assert filled['price'].tolist() == [7.0, 10.0, 4.0]
+
+def test_forward_fill_update_keeps_newest_observation():
+    imputer = ForwardFillImputer().fit(batch([1], ['2024-01-05'], [5.0]), ['price'])
+    imputer.update(batch([1, 2], ['2024-01-01', '2024-01-01'], [1.0, 2.0]))
+    assert imputer.last_values.loc[1, 'price'] == 5.0
+    assert imputer.last_values.loc[2, 'price'] == 2.0
+
+@pytest.mark.parametrize('imputer', [GroupedMedianImputer('product_id'), ForwardFillImputer(),
+                                     SampledKNNImputer(n_neighbors=1),
+                                     SampledKNNImputer(n_neighbors=1, partition_column='product_id')])
+def test_transform_leaves_input_unchanged(imputer):
+    data = batch([1, 1, 2], ['2024-01-01', '2024-01-02', '2024-01-01'], [1.0, np.nan, 4.0])
+    original = data.copy()
+    filled = imputer.fit_transform(data, ['price'])
+    pd.testing.assert_frame_equal(data, original)
+    assert filled['price'].notna().all()
+
+def test_sampled_knn_fills_empty_sample_column_with_median():
+    # Product 1 never reports a weight, so its KNN sample has no weight column
+    data = batch([1, 1, 2, 2], ['2024-01-01'] * 4, [1.0, 2.0, 3.0, 4.0]).assign(weight=[np.nan, np.nan, 6.0, 8.0])
+    imputer = SampledKNNImputer(n_neighbors=1, partition_column='product_id').fit(data, ['price', 'weight'])
+    new = batch([1, 1], ['2024-01-02'] * 2, [np.nan, 2.0]).assign(weight=np.nan)
+    filled = imputer.transform(new)
+    assert filled['weight'].tolist() == [7.0, 7.0]
+    assert filled['price'].notna().all()
@@ -0,0 +1,63 @@
+# analytics/tests/test_inference_server.py
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from models.inference_server import InferenceServer, MicroBatcher
+
+def doubling_predict(rows):
+    # Fails any call that includes the poison value, like a model rejecting an input
+    if (rows == -1).any():
+        raise ValueError("unsupported input")
+    return rows.sum(axis=1) * 2
+
+@pytest.fixture
+def batcher():
+    batcher = MicroBatcher('test', doubling_predict, max_batch_size=64, max_wait_ms=100, n_features=2)
+    yield batcher
+    batcher.stop()
+
+def test_non_finite_rows_are_rejected_before_batching(batcher):
+    for value in (np.nan, np.inf):
+        with pytest.raises(ValueError):
+            batcher.submit([[1.0, value]])
+    assert batcher.predict([[1.0, 2.0]]).tolist() == [6.0]
+
+def test_failing_request_does_not_fail_its_batch(batcher):
+    # Submitted together so all three land in one coalesced batch
+    futures = [batcher.submit([[1.0, 1.0]]), batcher.submit([[-1.0, 0.0]]), batcher.submit([[2.0, 2.0]])]
+    assert futures[0].result(timeout=5).tolist() == [4.0]
+    assert futures[2].result(timeout=5).tolist() == [8.0]
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=5)
+    assert batcher.get_stats()['requests'] == 2
+
+@pytest.fixture
+def client(batcher):
+    server = InferenceServer({'inference_timeout_seconds': 0.5})
+    server.batchers['predict'] = batcher
+    release = threading.Event()
+
+    def slow_predict(rows):
+        release.wait(5)
+        return doubling_predict(rows)
+
+    server.batchers['slow'] = MicroBatcher('slow', slow_predict, max_wait_ms=1, n_features=2)
+    yield server.app.test_client()
+    release.set()
+    server.batchers['slow'].stop()
+
+def test_bad_payloads_are_client_errors(client):
+    assert client.post('/predict', json={'instance': [1.0, 2.0]}).get_json() == {'prediction': 6.0}
+    for body in ([[1.0, 2.0]], 3, {'rows': []}, {'instance': [1.0, None]}, {'instance': [1.0, 'x']},
+                 {'instance': {'a': 1}}, {'instances': [[1.0, float('inf')]]}):
+        assert client.post('/predict', json=body).status_code == 400, body
+
+def test_timeout_is_service_unavailable(client):
+    start = time.perf_counter()
+    response = client.post('/slow', json={'instance': [1.0, 2.0]})
+    assert response.status_code == 503
+    assert time.perf_counter() - start < 5
@@ -0,0 +1,47 @@
+# analytics/tests/test_partitioned_model.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.staging import StagingStore
+from models.partitioned_model import GLOBAL_KEY, PartitionedPredictiveModel, partition_row_cap
+
+def staged_products(n, column, values, dtype):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'age_days': rng.integers(1, 300, n).astype(float),
+        'price': rng.uniform(1, 100, n),
+        'quantity': rng.integers(1, 500, n).astype(float),
+        'avg_transfer_time': rng.uniform(1, 10, n),
+        'last_updated': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(n) % 3, 'D'),
+        'days_until_next_transfer': rng.uniform(1, 20, n),
+        column: pd.Series(np.resize(np.asarray(values, dtype=object), n)).astype(dtype)
+    })
+
+@pytest.mark.parametrize('column, values, dtype, expected', [
+    ('category', ['Food', 'Toys', None], object, {'Food', 'Toys', 'unknown'}),
+    ('region', [1.0, 2.0, np.nan], float, {'1.0', '2.0', 'unknown'}),
+    ('batch_date', ['2024-02-01', '2024-03-01', None], 'datetime64[ns]',
+     {'2024-02-01 00:00:00', '2024-03-01 00:00:00', 'unknown'})
+])
+def test_partitions_keep_the_key_dtype(tmp_path, column, values, dtype, expected):
+    config = {'staging_root': str(tmp_path / 'staging'), 'partition_registry_dir': str(tmp_path / 'models'),
+              'partition_key': column, 'partition_min_rows': 10, 'partition_workers': 2,
+              'categorical_columns': [], 'search_mode': 'halving', 'search_max_fits': 3, 'search_candidates': 3,
+              'forest_step': 5, 'forest_max_estimators': 10}
+    products = staged_products(90, column, values, dtype)
+    StagingStore(config).write(products, 'cleaned_products', 'last_updated')
+
+    model = PartitionedPredictiveModel(config)
+    trained = model.train()
+    assert set(trained) == expected | {GLOBAL_KEY}
+    # Each partition model saw only its own rows, nulls included
+    assert all(trained[key]['rows'] == 30 for key in expected)
+
+    predictions = model.predict(products.head(6))
+    assert not np.isnan(predictions).any()
+
+def test_row_cap_can_be_set_directly():
+    assert partition_row_cap({'partition_max_rows': 500}, 5) == 500
+    assert partition_row_cap({'partition_worker_memory_mb': 1, 'forest_max_estimators': 10}, 5) > 0
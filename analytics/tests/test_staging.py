@@ -0,0 +1,35 @@
+# analytics/tests/test_staging.py
+
+import os
+
+import pandas as pd
+import pytest
+
+from data_processing.staging import StagingStore
+
+@pytest.fixture
+def store(tmp_path):
+    return StagingStore({'staging_root': str(tmp_path)})
+
+def test_null_category_reads_back_as_nan(store):
+    products = pd.DataFrame({'product_id': [1, 2, 3], 'category': ['Food', None, 'Toys'],
+                             'last_updated': ['2024-01-01', '2024-01-01', '2024-01-02']})
+    store.write(products, 'products', 'last_updated')
+
+    staged = store.read('products').sort_values('product_id', ignore_index=True)
+    assert staged['category'].isna().tolist() == [False, True, False]
+    batches = pd.concat(store.iter_batches('products')).sort_values('product_id', ignore_index=True)
+    assert batches['category'].isna().tolist() == [False, True, False]
+    assert store.read('products', filters=[('category', '=', 'Toys')])['product_id'].tolist() == [3]
+
+def test_dataset_without_category_is_partitioned_by_date_only(store, tmp_path):
+    certifications = pd.DataFrame({'product_id': [1, 2], 'certification_date': ['2024-01-01', '2024-01-02']})
+    store.write(certifications, 'certifications', 'certification_date')
+
+    assert not any('category=' in root for root, _, _ in os.walk(tmp_path / 'certifications'))
+    staged = store.read('certifications')
+    assert 'category' not in staged.columns
+    assert sorted(staged['date']) == ['2024-01-01', '2024-01-02']
+
+    with pytest.raises(ValueError):
+        store.write(certifications.assign(category='Food'), 'certifications', 'certification_date')
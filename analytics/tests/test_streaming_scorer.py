@@ -0,0 +1,72 @@
+# analytics/tests/test_streaming_scorer.py
+
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from models.streaming_scorer import DeviceWindows, StreamingAnomalyScorer, train_iot_detector
+
+# Two devices on very different scales: a window shared between them would
+# flag every reading of either one
+BASELINES = {'pallet-a': 100.0, 'pallet-b': 1000.0}
+
+def device_events(n, start, seed):
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(start, periods=n, freq='s')
+    rows = []
+    for i, timestamp in enumerate(timestamps):
+        for device_id, weight in BASELINES.items():
+            rows.append({'device_id': device_id, 'timestamp': timestamp.isoformat(), 'motion': False,
+                         'temperature': 20 + rng.normal(0, 0.5), 'humidity': 50 + rng.normal(0, 1),
+                         'distance': 30 + rng.normal(0, 0.5), 'weight': weight + rng.normal(0, 1)})
+    return rows
+
+def test_device_windows_are_kept_per_device():
+    windows = DeviceWindows(window_size=4, n_signals=1, min_count=2)
+    ids = np.array(['a', 'b', 'a', 'b', 'a', 'b'])
+    values = np.array([[1.0], [10.0], [3.0], [30.0], [np.nan], [20.0]])
+    zscores = windows.update(ids, values)
+    # Each reading is scored against its own device's earlier readings only
+    assert zscores[:4, 0].tolist() == [0.0, 0.0, 0.0, 0.0]
+    assert zscores[5, 0] == 0.0
+    # The missing reading is filled with the device's window mean
+    assert values[4, 0] == 2.0
+    slots = [windows.slots['a'], windows.slots['b']]
+    assert (windows.sums[slots] / windows.counts[slots])[:, 0].tolist() == [2.0, 20.0]
+
+def test_scorer_flags_spike_from_fake_feed(tmp_path):
+    config = {'sql_connection_string': f"sqlite:///{tmp_path / 'results.db'}", 'n_estimators': 20,
+              'contamination': 0.001, 'stream_max_batch_size': 16, 'stream_max_wait_ms': 10,
+              'stream_window_size': 20}
+    history = pd.DataFrame(device_events(200, '2024-01-01', seed=1))
+    history['timestamp'] = pd.to_datetime(history['timestamp'])
+    scorer = StreamingAnomalyScorer(config, train_iot_detector(config, history))
+
+    feed = device_events(60, '2024-01-02', seed=2)
+    spike = feed[-2]
+    assert spike['device_id'] == 'pallet-a'
+    spike['weight'] += 50
+
+    # The fake feed stands in for the MQTT client: it only calls submit()
+    worker = threading.Thread(target=scorer.process)
+    worker.start()
+    for event in feed:
+        scorer.submit(json.dumps(event).encode())
+    scorer.stop()
+    worker.join(timeout=30)
+    assert not worker.is_alive()
+
+    stats = scorer.get_stats()
+    assert stats['events_scored'] == len(feed)
+    assert stats['devices'] == 2
+    slots = [scorer.windows.slots[device_id] for device_id in BASELINES]
+    means = scorer.windows.sums[slots] / scorer.windows.counts[slots]
+    assert np.allclose(means[:, 3], list(BASELINES.values()), atol=5)
+
+    results = pd.read_sql('SELECT * FROM analytics_anomaly_results', scorer.results_engine)
+    assert len(results) == stats['anomalies_found']
+    spikes = results[results['max_zscore'] >= scorer.zscore_threshold]
+    assert spikes['device_id'].tolist() == ['pallet-a']
+    assert pd.to_datetime(spikes['timestamp']).tolist() == [pd.Timestamp(spike['timestamp'])]
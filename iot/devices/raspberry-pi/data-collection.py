@@ -1,6 +1,7 @@
+import os
 import time
 import json
-import random
+import socket
 import paho.mqtt.client as mqtt
 from datetime import datetime
 from gpiozero import DistanceSensor, MotionSensor
@@ -11,7 +12,23 @@ import RPi.GPIO as GPIO
 MQTT_BROKER = "mqtt.example.com"
 MQTT_PORT = 1883
 MQTT_TOPIC = "supply_chain/data"
-MQTT_CLIENT_ID = f"raspberry-pi-{random.randint(0, 1000)}"
+
+def get_device_id():
+    # Stable across restarts so the analytics side keeps one window per device:
+    # a configured DEVICE_ID, else the Pi's serial number, else the hostname
+    if os.environ.get("DEVICE_ID"):
+        return os.environ["DEVICE_ID"]
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("Serial"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return socket.gethostname()
+
+DEVICE_ID = get_device_id()
+MQTT_CLIENT_ID = f"raspberry-pi-{DEVICE_ID}"
 
 # Sensor Configuration
 ULTRASONIC_TRIGGER = 23
@@ -69,6 +86,7 @@ class SupplyChainSensor:
         self.hx.power_up()
         
         return {
+            "device_id": DEVICE_ID,
             "timestamp": datetime.now().isoformat(),
             "distance": distance,
             "motion": motion,